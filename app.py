@@ -2,6 +2,7 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
 import os # Digunakan untuk mengecek keberadaan file
+from excel_store import write_sheet
 
 # --- KONFIGURASI DASAR ---
 st.set_page_config(layout="wide", page_title="Habit Tracker Ibadah")
@@ -59,14 +60,8 @@ def save_data_to_excel(df, username):
     # Format tanggal sebagai string agar kompatibel dengan Excel
     df_to_save['Tanggal'] = df_to_save['Tanggal'].dt.strftime('%Y-%m-%d')
 
-    # Gunakan ExcelWriter untuk menyimpan ke sheet spesifik tanpa menimpa yang lain
-    try:
-        with pd.ExcelWriter(DB_FILE, mode='a', engine='openpyxl', if_sheet_exists='overlay') as writer:
-            df_to_save.to_excel(writer, sheet_name=username, index=False)
-    except FileNotFoundError:
-        # Jika file belum ada, gunakan mode 'w' (write) untuk membuatnya
-         with pd.ExcelWriter(DB_FILE, mode='w', engine='openpyxl') as writer:
-            df_to_save.to_excel(writer, sheet_name=username, index=False)
+    # Simpan ke sheet spesifik tanpa menimpa yang lain (terkunci + atomik, aman untuk banyak sesi)
+    write_sheet(DB_FILE, df_to_save, username, if_sheet_exists='overlay')
 
 
 # --- TAMPILAN UTAMA (UI) ---
@@ -3,6 +3,7 @@ import pandas as pd
 from datetime import datetime, timedelta
 import os
 import plotly.express as px
+from excel_store import write_sheet
 
 # --- KONFIGURASI DASAR ---
 st.set_page_config(layout="wide", page_title="Habit Tracker Ibadah")
@@ -69,10 +70,8 @@ def save_data_to_excel(df, username):
     """Menyimpan DataFrame ke sheet spesifik user."""
     df_to_save = df.copy()
     df_to_save['Tanggal'] = df_to_save['Tanggal'].dt.strftime('%Y-%m-%d')
-    # Gunakan mode 'a' (append) dengan 'replace' untuk sheet yang ada, atau 'w' (write) untuk file baru
-    mode = 'a' if os.path.exists(DB_FILE) else 'w'
-    with pd.ExcelWriter(DB_FILE, mode=mode, engine='openpyxl', if_sheet_exists='replace' if mode=='a' else None) as writer:
-        df_to_save.to_excel(writer, sheet_name=username, index=False)
+    # Ganti sheet user secara atomik di bawah file lock agar sesi lain tidak saling menimpa
+    write_sheet(DB_FILE, df_to_save, username)
 
 # --- UI UTAMA ---
 st.title("🕌 Habit Tracker Ibadah")
@@ -5,11 +5,10 @@ import os
 import io
 from fpdf import FPDF
 import plotly.express as px
-import sqlite3
+import letstracker_core as core
 
 # --- KONFIGURASI DASAR ---
 st.set_page_config(layout="wide", page_title="LetsTracker")
-DB_FILE = "letstracker.db"
 # --- PERUBAHAN: Menambahkan placeholder ---
 PARTICIPANTS = ["Pilih Nama..."] + ["Sahrul", "Umam", "Fatih", "Fahmi", "El", "Taqi", "Bang Abror", "Bang Habib", "Bang Yafie", "Bang Yudo"]
 HABITS = {
@@ -19,20 +18,15 @@ HABITS = {
 EXTRA_COLS = ["Catatan"]
 TARGETS = {"Qiyamulail": 2, "Olahraga": 3, "Shaum Sunnah": 3}
 
-# --- FUNGSI DATABASE (SQLite) ---
+# --- FUNGSI DATABASE (SQLite lewat letstracker_core) ---
+# Skema letstracker.db dikelola letstracker_core (UserId, FTS catatan, versi, audit, streak);
+# app2 tidak lagi menulis tabel progress langsung agar tidak melewati pemeliharaan itu.
 def init_db():
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    habit_cols = ", ".join([f'"{habit}" INTEGER DEFAULT 0' for habit in HABITS.keys()])
-    c.execute(f'CREATE TABLE IF NOT EXISTS progress (Tanggal TEXT, User TEXT, {habit_cols}, Catatan TEXT, PRIMARY KEY (Tanggal, User))')
-    conn.commit()
-    conn.close()
+    core.init_db()
 
 @st.cache_data(ttl=60)
 def load_data(username):
-    conn = sqlite3.connect(DB_FILE)
-    df = pd.read_sql_query("SELECT * FROM progress WHERE User = ?", conn, params=(username,))
-    conn.close()
+    df = core.load_data(username)
     if not df.empty and 'Tanggal' in df.columns:
         df['Tanggal'] = pd.to_datetime(df['Tanggal'], errors='coerce')
         df.dropna(subset=['Tanggal'], inplace=True)
@@ -43,31 +37,13 @@ def load_data(username):
 
 @st.cache_data(ttl=60)
 def load_all_user_data():
-    conn = sqlite3.connect(DB_FILE)
-    df = pd.read_sql_query("SELECT * FROM progress", conn)
-    conn.close()
-    if not df.empty and 'Tanggal' in df.columns:
-        df['Tanggal'] = pd.to_datetime(df['Tanggal'], errors='coerce')
-        df.dropna(subset=['Tanggal'], inplace=True)
-    return df
+    return core.load_all_user_data()
 
 def upsert_data(date, user, data_dict):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    cols = ["Tanggal", "User"] + list(HABITS.keys()) + EXTRA_COLS
-    values = [date.strftime('%Y-%m-%d'), user] + [data_dict.get(h, 0) for h in HABITS.keys()] + [data_dict.get('Catatan', '')]
-    placeholders = ", ".join(["?"] * len(cols))
-    quoted_cols = ", ".join([f'"{col}"' for col in cols])
-    c.execute(f"INSERT OR REPLACE INTO progress ({quoted_cols}) VALUES ({placeholders})", values)
-    conn.commit()
-    conn.close()
+    core.upsert_data(date, user, data_dict)
 
 def delete_data(date, user):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("DELETE FROM progress WHERE Tanggal = ? AND User = ?", (date.strftime('%Y-%m-%d'), user))
-    conn.commit()
-    conn.close()
+    core.delete_data(date, user)
 
 # --- FUNGSI BANTUAN LAINNYA ---
 def calculate_streaks(df):
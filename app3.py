@@ -5,6 +5,7 @@ import os
 import io
 from fpdf import FPDF
 import plotly.express as px
+from excel_store import write_sheet
 
 # --- KONFIGURASI DASAR ---
 st.set_page_config(layout="wide", page_title="LetsTracker")
@@ -129,9 +130,7 @@ def save_data(df, username):
     df_to_save = df.copy()
     if not df_to_save.empty:
         df_to_save['Tanggal'] = pd.to_datetime(df_to_save['Tanggal']).dt.strftime('%Y-%m-%d')
-    mode = 'a' if os.path.exists(DB_FILE) else 'w'
-    with pd.ExcelWriter(DB_FILE, mode=mode, engine='openpyxl', if_sheet_exists='replace' if mode == 'a' else None) as writer:
-        df_to_save.to_excel(writer, sheet_name=username, index=False)
+    write_sheet(DB_FILE, df_to_save, username)
 
 def display_progress_charts(df_period, period_title="", target_days=7):
     st.header(f"Visualisasi Progress {period_title}")
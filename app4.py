@@ -1,128 +1,90 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
-import os
 import io
-from fpdf import FPDF
+import uuid
 import plotly.express as px
-import sqlite3
+import letstracker_core as core
+import letstracker_perf as perf
+import letstracker_sqltrace as sqltrace
+import letstracker_metrics as metrics
+from letstracker_scheduler import PrecomputeScheduler
+from letstracker_perf import timed
+from letstracker_charts import FIGURE_CACHE, calendar_heatmap, group_heatmap, progress_bar, progress_pie, leaderboard_bar, rank_bump, habit_matrix, forecast_bar
+from letstracker_core import (
+    GROUPS, DEFAULT_GROUP, participants, HABITS, ADMINS, init_db, upsert_data, delete_data, current_data_version, iter_progress_export,
+    export_all_participants_excel, DAILY_HABITS, progress_summary, habit_trend, search_notes, NOTE_SEARCH_PAGE_SIZE, archived_years, period_bounds,
+    missing_entries, compliance_matrix, rank_history, RANK_HISTORY_WEEKS, COOCCURRENCE_MAX_LAG, FORECAST_WINDOW_DAYS, COMPLIANCE_DONE, COMPLIANCE_PARTIAL, COMPLIANCE_NONE,
+)
 
 # --- KONFIGURASI DASAR ---
 st.set_page_config(layout="wide", page_title="LetsTracker")
-DB_FILE = "letstracker.db"
-PARTICIPANTS = ["Sahrul", "Umam", "Fatih", "Fahmi", "El", "Taqi", "Bang Abror", "Bang Habib", "Bang Yafie", "Bang Yudo"]
-HABITS = {
-    "Juz 30 (Hafalan/Murajaah)": "daily", "Hadis Arbain 1-25": "daily", "Tilawah 1/2 Juz": "daily",
-    "Al-Matsurat (Pagi/Sore)": "daily", "Qiyamulail": "weekly", "Olahraga": "weekly", "Shaum Sunnah": "monthly"
-}
-EXTRA_COLS = ["Catatan"]
-TARGETS = {"Qiyamulail": 2, "Olahraga": 3, "Shaum Sunnah": 3}
 
-# --- FUNGSI DATABASE (SQLite) ---
-def init_db():
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    habit_cols = ", ".join([f'"{habit}" INTEGER DEFAULT 0' for habit in HABITS.keys()])
-    c.execute(f'CREATE TABLE IF NOT EXISTS progress (Tanggal TEXT, User TEXT, {habit_cols}, Catatan TEXT, PRIMARY KEY (Tanggal, User))')
-    conn.commit()
-    conn.close()
+@st.cache_resource
+def start_metrics_server():
+    # Satu endpoint /metrics per proses server (LETSTRACKER_METRICS_PORT)
+    return metrics.start_server() if metrics.METRICS_PORT else None
 
+start_metrics_server()
+perf.start_run("app4")
+
+# --- FUNGSI DATABASE (SQLite, di-cache) ---
+# Argumen `version` (versi data grup) ikut kunci cache: penulisan di satu grup hanya
+# membuat entri cache grup itu usang, grup lain tetap hit
 @st.cache_data(ttl=60)
-def load_data(username):
-    conn = sqlite3.connect(DB_FILE)
-    df = pd.read_sql_query("SELECT * FROM progress WHERE User = ?", conn, params=(username,))
-    conn.close()
-    if not df.empty and 'Tanggal' in df.columns:
-        df['Tanggal'] = pd.to_datetime(df['Tanggal'], errors='coerce')
-        df.dropna(subset=['Tanggal'], inplace=True)
-        for col in list(HABITS.keys()) + EXTRA_COLS:
-            if col not in df.columns: df[col] = 0 if col != 'Catatan' else ''
-        df['Catatan'] = df['Catatan'].fillna('')
-    return df
+def _load_data(username, version):
+    return core.load_data(username)
 
 @st.cache_data(ttl=60)
-def load_all_user_data():
-    conn = sqlite3.connect(DB_FILE)
-    df = pd.read_sql_query("SELECT * FROM progress", conn)
-    conn.close()
-    if not df.empty and 'Tanggal' in df.columns:
-        df['Tanggal'] = pd.to_datetime(df['Tanggal'], errors='coerce')
-        df.dropna(subset=['Tanggal'], inplace=True)
-    return df
+def _load_streaks(username, today, version):
+    return core.load_streaks(username, today)
 
-def upsert_data(date, user, data_dict):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    cols = ["Tanggal", "User"] + list(HABITS.keys()) + EXTRA_COLS
-    values = [date.strftime('%Y-%m-%d'), user] + [data_dict.get(h, 0) for h in HABITS.keys()] + [data_dict.get('Catatan', '')]
-    placeholders = ", ".join(["?"] * len(cols))
-    quoted_cols = ", ".join([f'"{col}"' for col in cols])
-    c.execute(f"INSERT OR REPLACE INTO progress ({quoted_cols}) VALUES ({placeholders})", values)
-    conn.commit()
-    conn.close()
+@st.cache_data(ttl=60)
+def _completion_matrix(start, end, group, version):
+    return core.completion_matrix(start, end, group=group)
 
-def delete_data(date, user):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("DELETE FROM progress WHERE Tanggal = ? AND User = ?", (date.strftime('%Y-%m-%d'), user))
-    conn.commit()
-    conn.close()
+@st.cache_data(ttl=60)
+def _habit_cooccurrence(start, end, group, lag, version):
+    return core.habit_cooccurrence(start, end, group=group, lag=lag)
 
-# --- FUNGSI BANTUAN LAINNYA ---
-def calculate_streaks(df):
-    if df.empty: return {}
-    streaks = {}
-    daily_habits = {k for k, v in HABITS.items() if v == 'daily'}
-    df['Tanggal'] = pd.to_datetime(df['Tanggal'], errors='coerce')
-    df.dropna(subset=['Tanggal'], inplace=True)
-    if df.empty: return {h: 0 for h in daily_habits}
-    df_sorted = df.sort_values(by="Tanggal", ascending=False).reset_index(drop=True)
-    today = datetime.now().date()
-    last_entry_date = df_sorted.loc[0, 'Tanggal'].date()
-    if last_entry_date < today - timedelta(days=1): return {h: 0 for h in daily_habits}
-    for habit in daily_habits:
-        streak_count, expected_date = 0, last_entry_date
-        if df_sorted.loc[0].get(habit, 0) == 1:
-            for _, row in df_sorted.iterrows():
-                if row.get(habit, 0) == 1 and row['Tanggal'].date() == expected_date:
-                    streak_count += 1
-                    expected_date -= timedelta(days=1)
-                else: break
-        streaks[habit] = streak_count
-    return streaks
+# Berkas unduhan per peserta: `_df` (hasil load_data untuk versi yang sama) tidak ikut di-hash,
+# kunci cukup (username, version) sehingga rerun tab lain tidak membangun ulang xlsx/PDF
+@st.cache_data(ttl=60)
+def _user_excel_bytes(_df, username, version):
+    return core.user_excel_bytes(_df, username)
+
+@st.cache_data(ttl=60)
+def _user_pdf_bytes(_df, username, version):
+    return core.df_to_pdf(_df, f"Laporan Lengkap - {username}")
 
-def df_to_pdf(df, title="Laporan Progress"):
-    # (Fungsi ini tidak berubah)
-    return b''
+load_data = perf.cache_tracked(_load_data, "load_data")
+load_streaks = perf.cache_tracked(_load_streaks, "load_streaks")
+completion_matrix = perf.cache_tracked(_completion_matrix, "completion_matrix")
+habit_cooccurrence = perf.cache_tracked(_habit_cooccurrence, "habit_cooccurrence")
+user_excel_bytes = perf.cache_tracked(_user_excel_bytes, "user_excel_bytes")
+user_pdf_bytes = perf.cache_tracked(_user_pdf_bytes, "df_to_pdf")
+
+@st.cache_resource
+def get_scheduler():
+    # Satu thread precompute leaderboard per proses server
+    scheduler = PrecomputeScheduler()
+    core.add_write_listener(scheduler.notify_write)
+    scheduler.start()
+    return scheduler
 
 def display_progress_summary(df_period, period_title="", target_days=7):
     st.header(f"Ringkasan Progress {period_title}")
     if df_period.empty:
         st.info("Tidak ada data untuk periode ini.")
         return
-    progress_data, total_actual, total_target = [], df_period[list(HABITS.keys())].sum().sum(), 0.0
-    for habit, type in HABITS.items():
-        actual = df_period[habit].sum()
-        target = 0.0
-        if type == 'daily': target = float(target_days)
-        elif type == 'weekly': target = TARGETS[habit] * (target_days / 7.0)
-        elif type == 'monthly': target = TARGETS[habit] * (target_days / 30.0)
-        total_target += target
-        percentage = (actual / target * 100) if target > 0 else 0
-        progress_data.append({"Ibadah": habit, "Capaian (%)": percentage})
+    df_progress, total_actual, total_target = progress_summary(df_period, target_days)
     col1, col2 = st.columns([3, 2])
-    with col1:
+    with col1, timed("chart_ringkasan_bar"):
         st.subheader("Capaian per Ibadah (%)")
-        df_progress = pd.DataFrame(progress_data)
-        fig_bar = px.bar(df_progress, x="Capaian (%)", y="Ibadah", orientation='h', text="Capaian (%)", color="Ibadah", color_discrete_sequence=px.colors.qualitative.Pastel)
-        fig_bar.update_traces(texttemplate='%{x:.0f}%')
-        fig_bar.update_layout(xaxis_range=[0, 100], yaxis={'categoryorder': 'total ascending'}, showlegend=False)
-        st.plotly_chart(fig_bar, use_container_width=True, key=f"bar_{period_title}")
-    with col2:
+        st.plotly_chart(progress_bar(df_progress), use_container_width=True, key=f"bar_{period_title}")
+    with col2, timed("chart_ringkasan_pie"):
         st.subheader("Progress Keseluruhan")
-        remaining = max(0, total_target - total_actual)
-        pie_fig = px.pie(pd.DataFrame({"Status": ["Selesai", "Belum"], "Jumlah": [total_actual, remaining]}), values="Jumlah", names="Status", hole=0.4, color_discrete_map={"Selesai": "mediumseagreen", "Belum": "lightgray"})
-        st.plotly_chart(pie_fig, use_container_width=True, key=f"pie_{period_title}")
+        st.plotly_chart(progress_pie(total_actual, total_target), use_container_width=True, key=f"pie_{period_title}")
 
 # --- UI UTAMA ---
 init_db()
@@ -131,16 +93,22 @@ st.title("🕌 LetsTracker - Habit Tracker Ibadah")
 if 'edit_date' not in st.session_state: st.session_state.edit_date = None
 if 'confirm_delete_date' not in st.session_state: st.session_state.confirm_delete_date = None
 if 'show_success' not in st.session_state: st.session_state.show_success = False
+if 'session_id' not in st.session_state: st.session_state.session_id = uuid.uuid4().hex
+metrics.touch_session(st.session_state.session_id)
 
 with st.sidebar:
     st.header("👤 Pengguna")
-    username = st.selectbox("Pilih Nama Peserta", options=PARTICIPANTS)
+    group = st.selectbox("Pilih Grup", options=list(GROUPS)) if len(GROUPS) > 1 else DEFAULT_GROUP
+    username = st.selectbox("Pilih Nama Peserta", options=participants(group))
     st.header("🗓️ Pilih Tanggal Input")
     selected_date_input = st.date_input("Pilih tanggal untuk diisi", value=datetime.now().date())
 
-df = load_data(username)
+group_version = current_data_version(group)
+df = load_data(username, group_version)
+archived = set(archived_years())
 
-main_tabs = st.tabs(["📝 Input Jurnal", "📊 Laporan & Progress", "⚙️ Manajemen Data", "📥 Unduh Laporan"])
+is_admin = username in ADMINS
+main_tabs = st.tabs(["📝 Input Jurnal", "📊 Laporan & Progress", "⚙️ Manajemen Data", "📥 Unduh Laporan"] + (["🛡️ Pemantauan"] if is_admin else []))
 
 with main_tabs[0]:
     if st.session_state.show_success:
@@ -160,93 +128,93 @@ with main_tabs[0]:
     else:
         daily_data = {}
         button_label = "✅ Simpan Jurnal Baru"
+    if selected_date_input.year in archived:
+        st.warning(f"Data tahun {selected_date_input.year} sudah diarsipkan dan hanya bisa dibaca.")
     with st.form(key="daily_journal_form"):
         cols = st.columns(2)
         for i, habit in enumerate(HABITS.keys()):
             daily_data[habit] = cols[i % 2].checkbox(habit, value=bool(daily_data.get(habit, 0)))
         daily_data['Catatan'] = st.text_area("Catatan Harian (opsional)...", value=daily_data.get('Catatan', ''))
-        if st.form_submit_button(button_label):
+        if st.form_submit_button(button_label, disabled=selected_date_input.year in archived):
             data_to_save = {habit: 1 if daily_data.get(habit, False) else 0 for habit in HABITS}
             data_to_save['Catatan'] = daily_data.get('Catatan', '')
-            upsert_data(date_obj, username, data_to_save)
+            upsert_data(date_obj, username, data_to_save, session=st.session_state.session_id)
             st.session_state.show_success = True
-            st.cache_data.clear()
             st.rerun()
 
 with main_tabs[1]:
     st.header(f"Laporan & Progress untuk {username}")
     st.subheader("🔥 Runtutan (Streak) Ibadah Harian")
-    streaks = calculate_streaks(df)
+    streaks = load_streaks(username, datetime.now().date(), group_version)
     if streaks:
-        daily_habit_names = [k for k, v in HABITS.items() if v == 'daily']
-        streak_cols = st.columns(len(daily_habit_names))
-        for i, habit in enumerate(daily_habit_names):
-            streak_cols[i].metric(habit, f"{streaks.get(habit, 0)} hari")
+        streak_cols = st.columns(len(DAILY_HABITS))
+        for i, habit in enumerate(DAILY_HABITS):
+            current, longest = streaks.get(habit, (0, 0))
+            streak_cols[i].metric(habit, f"{current} hari", help=f"Terpanjang: {longest} hari")
     st.markdown("---")
-    report_tabs = st.tabs(["Ringkasan", "🏆 Leaderboard", "Analisis Kustom"])
+    report_tabs = st.tabs(["Ringkasan", "🏆 Leaderboard", "Analisis Kustom", "📅 Kalender", "🔗 Keterkaitan"])
     today = datetime.now().date()
     with report_tabs[0]:
         if df.empty:
             st.info("Belum ada data untuk ditampilkan.")
         else:
             df['Tanggal'] = pd.to_datetime(df['Tanggal'], errors='coerce')
-            start_of_week = today - timedelta(days=today.weekday())
+            start_of_week, start_of_month, days_in_month = period_bounds(today)
             display_progress_summary(df[df['Tanggal'].dt.date >= start_of_week], "Pekan Ini", target_days=7)
             st.markdown("---")
-            start_of_month = today.replace(day=1)
-            days_in_month = (start_of_month.replace(month=start_of_month.month % 12 + 1, day=1) - timedelta(days=1)).day
             display_progress_summary(df[df['Tanggal'].dt.date >= start_of_month], "Bulan Ini", target_days=days_in_month)
+            # Proyeksi semua peserta dihitung scheduler bersama leaderboard, hanya saat data berubah
+            forecast_snapshot = get_scheduler().snapshot(group, wait=10)
+            if forecast_snapshot is not None:
+                st.subheader("🔮 Proyeksi Akhir Bulan")
+                forecast = forecast_snapshot.proyeksi_bulanan
+                forecast = forecast[forecast["Peserta"] == username].drop(columns="Peserta")
+                st.caption(f"Berdasarkan laju {FORECAST_WINDOW_DAYS} hari terakhir; garis error = rentang keyakinan 90%, "
+                           "persentase terhadap target sebulan penuh.")
+                with timed("chart_proyeksi"):
+                    st.plotly_chart(forecast_bar(forecast), use_container_width=True)
+                st.dataframe(forecast, hide_index=True, use_container_width=True)
     with report_tabs[1]:
         st.header("🏆 Papan Peringkat Peserta")
-        all_users_df = load_all_user_data()
-        if all_users_df.empty:
+        scheduler = get_scheduler()
+        leaderboard_snapshot = scheduler.snapshot(group, wait=10)
+        if leaderboard_snapshot is None:
+            st.info("Leaderboard sedang dihitung, muat ulang halaman sebentar lagi.")
+        elif leaderboard_snapshot.leaderboard_pekanan.empty and leaderboard_snapshot.leaderboard_bulanan.empty:
             st.warning("Belum ada data dari peserta manapun untuk ditampilkan.")
         else:
-            all_users_df['Tanggal'] = pd.to_datetime(all_users_df['Tanggal'], errors='coerce')
+            st.caption(f"Diperbarui {leaderboard_snapshot.age_seconds:.0f} detik lalu (versi data {leaderboard_snapshot.data_version})"
+                       + (" · pembaruan sedang diproses" if scheduler.is_pending(group) else ""))
             st.subheader("Peringkat Pekan Ini")
-            start_of_week = today - timedelta(days=today.weekday())
-            weekly_data_all = all_users_df[all_users_df['Tanggal'].dt.date >= start_of_week]
-            leaderboard_weekly = []
-            if not weekly_data_all.empty:
-                for user, group in weekly_data_all.groupby('User'):
-                    total_actual = sum(group[habit].sum() for habit in HABITS)
-                    total_target = sum(TARGETS.get(h, 7) for h, t in HABITS.items() if t != 'monthly')
-                    percentage = (total_actual / total_target * 100) if total_target > 0 else 0
-                    leaderboard_weekly.append({"Peserta": user, "Progress (%)": round(percentage, 2)})
-                lb_df_w = pd.DataFrame(leaderboard_weekly).sort_values("Progress (%)", ascending=False).reset_index(drop=True)
-                lb_df_w.index += 1
+            lb_df_w = leaderboard_snapshot.leaderboard_pekanan
+            if not lb_df_w.empty:
                 col1, col2 = st.columns([1, 2])
                 with col1: st.dataframe(lb_df_w, use_container_width=True)
-                with col2:
-                    fig_lb_w = px.bar(lb_df_w, x="Progress (%)", y="Peserta", orientation='h', title="Visualisasi Peringkat Pekanan", text='Progress (%)', color="Peserta")
-                    fig_lb_w.update_layout(yaxis={'categoryorder':'total descending'}, xaxis_range=[0,100], showlegend=False)
-                    st.plotly_chart(fig_lb_w, use_container_width=True)
+                with col2, timed("chart_leaderboard_pekanan"):
+                    st.plotly_chart(leaderboard_bar(lb_df_w, title="Visualisasi Peringkat Pekanan"), use_container_width=True)
             else: st.info("Belum ada data pekan ini untuk leaderboard.")
             st.markdown("---")
             st.subheader("Peringkat Bulan Ini")
-            start_of_month = today.replace(day=1)
-            monthly_data_all = all_users_df[all_users_df['Tanggal'].dt.date >= start_of_month]
-            leaderboard_monthly = []
-            if not monthly_data_all.empty:
-                days_passed, num_weeks_passed = today.day, today.day / 7
-                for user, group in monthly_data_all.groupby('User'):
-                    total_actual = sum(group[habit].sum() for habit in HABITS)
-                    total_target = 0
-                    for habit, type in HABITS.items():
-                        if type == "daily": total_target += days_passed
-                        elif type == "weekly": total_target += TARGETS[habit] * num_weeks_passed
-                        elif type == "monthly": total_target += TARGETS[habit]
-                    percentage = (total_actual / total_target * 100) if total_target > 0 else 0
-                    leaderboard_monthly.append({"Peserta": user, "Progress (%)": round(percentage, 2)})
-                lb_df_m = pd.DataFrame(leaderboard_monthly).sort_values("Progress (%)", ascending=False).reset_index(drop=True)
-                lb_df_m.index += 1
+            lb_df_m = leaderboard_snapshot.leaderboard_bulanan
+            if not lb_df_m.empty:
                 col1_m, col2_m = st.columns([1, 2])
                 with col1_m: st.dataframe(lb_df_m, use_container_width=True)
-                with col2_m:
-                    fig_lb_m = px.bar(lb_df_m, x="Progress (%)", y="Peserta", orientation='h', title="Visualisasi Peringkat Bulanan", text='Progress (%)', color="Peserta")
-                    fig_lb_m.update_layout(yaxis={'categoryorder':'total descending'}, xaxis_range=[0,100], showlegend=False)
-                    st.plotly_chart(fig_lb_m, use_container_width=True)
+                with col2_m, timed("chart_leaderboard_bulanan"):
+                    st.plotly_chart(leaderboard_bar(lb_df_m, title="Visualisasi Peringkat Bulanan"), use_container_width=True)
             else: st.info("Belum ada data bulan ini untuk leaderboard.")
+        st.markdown("---")
+        st.subheader("📈 Riwayat Peringkat Pekanan")
+        rank_weeks = st.slider("Jumlah pekan", min_value=4, max_value=26, value=RANK_HISTORY_WEEKS, key="rank_weeks")
+        # Pekan yang sudah selesai di-cache di core; yang dihitung ulang hanya pekan berjalan
+        history = rank_history(rank_weeks, today, group)
+        if history.empty:
+            st.info("Belum ada data untuk riwayat peringkat.")
+        else:
+            with timed("chart_riwayat_peringkat"):
+                st.plotly_chart(rank_bump(history, title=f"Peringkat {rank_weeks} Pekan Terakhir"), use_container_width=True)
+            latest = history[history["Pekan"] == history["Pekan"].max()]
+            movement = latest["Perubahan"].map(lambda d: "–" if pd.isna(d) else ("=" if d == 0 else (f"▲ {d}" if d > 0 else f"▼ {-d}")))
+            st.dataframe(latest.assign(Perubahan=movement).drop(columns="Pekan"), hide_index=True, use_container_width=True)
     with report_tabs[2]:
         st.header("Analisis Performa Ibadah")
         if df.empty:
@@ -271,9 +239,50 @@ with main_tabs[1]:
                         col_stats1.metric("Ibadah Paling Sering Dilakukan", habit_counts.index[0], f"{int(habit_counts.iloc[0])} kali")
                         col_stats2.metric("Ibadah Paling Jarang Dilakukan", habit_counts.index[-1], f"{int(habit_counts.iloc[-1])} kali")
                     st.subheader("Grafik Total Pelaksanaan Ibadah")
-                    fig_bar_custom = px.bar(x=habit_counts.values, y=habit_counts.index, orientation='h', title="Total Pelaksanaan Ibadah", color=habit_counts.index, color_discrete_sequence=px.colors.qualitative.Pastel)
-                    fig_bar_custom.update_layout(showlegend=False, yaxis_title="Ibadah", xaxis_title="Jumlah Pelaksanaan", yaxis={'categoryorder':'total descending'})
-                    st.plotly_chart(fig_bar_custom, use_container_width=True)
+                    with timed("chart_analisis_kustom"):
+                        fig_bar_custom = px.bar(x=habit_counts.values, y=habit_counts.index, orientation='h', title="Total Pelaksanaan Ibadah", color=habit_counts.index, color_discrete_sequence=px.colors.qualitative.Pastel)
+                        fig_bar_custom.update_layout(showlegend=False, yaxis_title="Ibadah", xaxis_title="Jumlah Pelaksanaan", yaxis={'categoryorder':'total descending'})
+                        st.plotly_chart(fig_bar_custom, use_container_width=True)
+                    trend_label, trend_df = habit_trend(filtered_df, start_date, end_date)
+                    st.subheader(f"Tren Capaian per Ibadah ({trend_label})")
+                    with timed("chart_tren"):
+                        fig_trend = px.line(trend_df, x="Tanggal", y="Capaian (%)", color="Ibadah", color_discrete_sequence=px.colors.qualitative.Pastel)
+                        fig_trend.update_layout(yaxis_title="Capaian (%)", xaxis_title=None, hovermode="x unified")
+                        st.plotly_chart(fig_trend, use_container_width=True)
+    with report_tabs[3]:
+        st.header("📅 Kalender Ibadah Setahun Terakhir")
+        heatmap_users, heatmap_days, heatmap_matrix = completion_matrix(today - timedelta(days=364), today, group, group_version)
+        st.plotly_chart(calendar_heatmap(heatmap_days, heatmap_matrix[heatmap_users.index(username)], title=username), use_container_width=True)
+        st.subheader("Semua Peserta" if len(GROUPS) == 1 else f"Semua Peserta Grup {group}")
+        st.plotly_chart(group_heatmap(heatmap_users, heatmap_days, heatmap_matrix), use_container_width=True)
+    with report_tabs[4]:
+        st.header("🔗 Keterkaitan Antar Ibadah")
+        col1, col2, col3 = st.columns(3)
+        co_start = col1.date_input("Tanggal Mulai", today - timedelta(days=364), key="co_start")
+        co_end = col2.date_input("Tanggal Akhir", today, key="co_end")
+        co_lag = col3.slider("Jarak hari (A → B)", min_value=0, max_value=COOCCURRENCE_MAX_LAG, value=1, key="co_lag")
+        if co_start > co_end:
+            st.error("Tanggal Mulai tidak boleh melebihi Tanggal Akhir.")
+        else:
+            cooccurrence = habit_cooccurrence(co_start, co_end, group, co_lag, group_version)
+            everyone = "Seluruh grup" if len(GROUPS) == 1 else f"Seluruh grup {group}"
+            scope = st.radio("Cakupan", [username, everyone], horizontal=True, key="co_scope")
+            frames = cooccurrence.frames(None if scope == everyone else username)
+            if not frames["Bersamaan"].to_numpy().any():
+                st.info("Belum ada data pada rentang tanggal yang dipilih.")
+            else:
+                st.caption("Lift > 1: kedua ibadah lebih sering dikerjakan pada hari yang sama daripada kebetulan. "
+                           f"Peluang Lanjut: peluang ibadah kolom dikerjakan {co_lag} hari setelah ibadah baris dikerjakan.")
+                col_lift, col_follow = st.columns(2)
+                with col_lift, timed("chart_keterkaitan_lift"):
+                    st.plotly_chart(habit_matrix(frames["Lift"], title="Lift (hari yang sama)", center=1), use_container_width=True)
+                with col_follow, timed("chart_keterkaitan_lanjut"):
+                    st.plotly_chart(habit_matrix(frames["Peluang Lanjut (%)"], title=f"Peluang Lanjut (%) setelah {co_lag} hari"), use_container_width=True)
+                st.subheader("Per Peserta")
+                col_a, col_b = st.columns(2)
+                habit_a = col_a.selectbox("Jika mengerjakan (A)", options=list(HABITS), key="co_habit_a")
+                habit_b = col_b.selectbox(f"Maka {co_lag} hari kemudian (B)", options=list(HABITS), key="co_habit_b")
+                st.dataframe(cooccurrence.pair(habit_a, habit_b), hide_index=True, use_container_width=True)
 
 with main_tabs[2]:
     st.header(f"Manajemen Data Jurnal - {username}")
@@ -289,10 +298,9 @@ with main_tabs[2]:
             data_to_edit['Catatan'] = st.text_area("Catatan", value=data_to_edit.get('Catatan', ''))
             c1,c2 = st.columns(2)
             if c1.form_submit_button("💾 Simpan Perubahan", type="primary"):
-                upsert_data(edit_date_obj, username, data_to_edit)
+                upsert_data(edit_date_obj, username, data_to_edit, session=st.session_state.session_id)
                 st.success("✨ Perubahan berhasil disimpan!")
                 st.session_state.edit_date = None
-                st.cache_data.clear()
                 st.rerun()
             if c2.form_submit_button("❌ Batal"):
                 st.session_state.edit_date = None
@@ -302,15 +310,31 @@ with main_tabs[2]:
         st.warning(f"**Konfirmasi Hapus**: Yakin ingin menghapus data tanggal **{confirm_date_obj.strftime('%d %B %Y')}**?")
         c1, c2, _ = st.columns([1,1,4])
         if c1.button("✅ Ya, Hapus", type="primary"):
-            delete_data(confirm_date_obj, username)
+            delete_data(confirm_date_obj, username, session=st.session_state.session_id)
             st.session_state.confirm_delete_date = None
-            st.cache_data.clear()
             st.success("Data berhasil dihapus.")
             st.rerun()
         if c2.button("❌ Batal"):
             st.session_state.confirm_delete_date = None
             st.rerun()
     else:
+        st.subheader("🔎 Cari Catatan")
+        note_query = st.text_input("Kata kunci", key="note_query", placeholder='mis. tahajud, sabar*, "bangun kesiangan"',
+                                   help='Kata diakhiri * mencari awalan kata; teks dalam tanda kutip dicari sebagai frasa persis.',
+                                   on_change=lambda: st.session_state.update(note_page=1))
+        if note_query:
+            note_page = st.session_state.get("note_page", 1)
+            note_results, note_total = search_notes(username, note_query, page=note_page - 1)
+            if note_total == 0:
+                st.info("Tidak ada catatan yang cocok.")
+            else:
+                note_pages = -(-note_total // NOTE_SEARCH_PAGE_SIZE)
+                st.caption(f"{note_total} catatan cocok · halaman {min(note_page, note_pages)} dari {note_pages}")
+                for _, result in note_results.iterrows():
+                    st.markdown(f"**{pd.to_datetime(result['Tanggal']).strftime('%d %B %Y')}** — {result['Cuplikan']}")
+                if note_pages > 1:
+                    st.number_input("Halaman", min_value=1, max_value=note_pages, step=1, key="note_page")
+        st.markdown("---")
         st.subheader("Daftar Jurnal Tersimpan")
         if not df.empty:
             for _, row in df.sort_values(by="Tanggal", ascending=False).iterrows():
@@ -320,10 +344,11 @@ with main_tabs[2]:
                     if pd.notna(row.get('Catatan')) and row.get('Catatan'):
                         st.info(f"**Catatan**: {row['Catatan']}")
                     c1, c2 = st.columns([1,1])
-                    if c1.button("✏️ Edit", key=f"edit_{row['Tanggal']}"):
+                    read_only = row['Tanggal'].year in archived
+                    if c1.button("✏️ Edit", key=f"edit_{row['Tanggal']}", disabled=read_only):
                         st.session_state.edit_date = row['Tanggal']
                         st.rerun()
-                    if c2.button("🗑️ Hapus", key=f"del_{row['Tanggal']}"):
+                    if c2.button("🗑️ Hapus", key=f"del_{row['Tanggal']}", disabled=read_only):
                         st.session_state.confirm_delete_date = row['Tanggal']
                         st.rerun()
         else:
@@ -340,9 +365,77 @@ with main_tabs[3]:
             df_display = df_display.drop(columns=['User'])
         st.dataframe(df_display.sort_values("Tanggal", ascending=False))
         c1, c2 = st.columns(2)
-        output_excel = io.BytesIO()
-        with pd.ExcelWriter(output_excel, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name=f'Progress_{username}')
-        c1.download_button("📥 Unduh Semua Data (Excel)", output_excel.getvalue(), f"semua_progress_{username}.xlsx")
-        pdf_data = df_to_pdf(df, f"Laporan Lengkap - {username}")
-        c2.download_button("📄 Unduh Semua Data (PDF)", pdf_data, f"semua_progress_{username}.pdf")
\ No newline at end of file
+        c1.download_button("📥 Unduh Semua Data (Excel)", user_excel_bytes(df, username, group_version), f"semua_progress_{username}.xlsx")
+        c2.download_button("📄 Unduh Semua Data (PDF)", user_pdf_bytes(df, username, group_version), f"semua_progress_{username}.pdf")
+    st.markdown("---")
+    st.subheader("Unduh Data Semua Peserta")
+    if st.button("⚙️ Siapkan Excel Semua Peserta"):
+        output_all = io.BytesIO()
+        st.session_state.export_all_stats = export_all_participants_excel(output_all)
+        st.session_state.export_all_excel = output_all.getvalue()
+    if st.session_state.get('export_all_excel'):
+        stats = st.session_state.export_all_stats
+        st.caption(f"{stats['rows']} baris, {stats['sheets']} sheet dalam {stats['seconds']:.2f} detik ({stats['rows_per_sec']:,.0f} baris/detik)")
+        st.download_button("📥 Unduh Excel Semua Peserta", st.session_state.export_all_excel, "semua_progress_peserta.xlsx")
+    st.subheader("Ekspor Ringan (CSV/NDJSON)")
+    c1, c2 = st.columns(2)
+    export_fmt = c1.radio("Format", ["csv", "ndjson"], horizontal=True)
+    export_since = c2.number_input("Hanya perubahan setelah versi (0 = semua data)", min_value=0, value=0, step=1)
+    if st.button("⚙️ Siapkan Ekspor Ringan"):
+        st.session_state.export_light_version = current_data_version()
+        with timed("iter_progress_export"):
+            st.session_state.export_light_data = "".join(iter_progress_export(export_fmt, since=export_since or None)).encode("utf-8")
+        st.session_state.export_light_name = f"progress_sejak_{export_since}.{export_fmt}"
+    if st.session_state.get('export_light_data') is not None:
+        st.caption(f"Penanda versi untuk ekspor berikutnya: {st.session_state.export_light_version}")
+        st.download_button("📥 Unduh Ekspor Ringan", st.session_state.export_light_data, st.session_state.export_light_name)
+
+if is_admin:
+    with main_tabs[4]:
+        # Tanpa cache: anti-join per peserta lewat primary key, cukup beberapa milidetik
+        st.header("🛡️ Pemantauan Pengisian Jurnal")
+        check_date = st.date_input("Tanggal yang dicek", value=datetime.now().date(), key="monitor_date")
+        missing = missing_entries(check_date, group)
+        not_filled = int((missing["Status"] == "Belum mengisi").sum())
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Peserta aktif", len(participants(group)))
+        c2.metric("Belum mengisi", not_filled)
+        c3.metric("Belum lengkap", len(missing) - not_filled)
+        if missing.empty:
+            st.success("Semua peserta sudah mengisi ibadah harian dengan lengkap.")
+        else:
+            st.dataframe(missing.drop(columns="Grup"), hide_index=True, use_container_width=True)
+        st.subheader("Kepatuhan 7 Hari Terakhir")
+        compliance = compliance_matrix(check_date, 7, group)
+        compliance.columns = [day.strftime('%a %d/%m') for day in compliance.columns]
+        # Series.map per kolom, bukan DataFrame.replace (gagal untuk int -> string di pandas 3)
+        status_labels = {COMPLIANCE_DONE: "✅", COMPLIANCE_PARTIAL: "🟡", COMPLIANCE_NONE: "❌"}
+        st.dataframe(compliance.apply(lambda column: column.map(status_labels)), use_container_width=True)
+        st.caption("✅ ibadah harian lengkap · 🟡 mengisi, belum lengkap · ❌ tidak mengisi")
+
+# --- PANEL PROFILING (ADMIN, LETSTRACKER_PROFILE=1) ---
+profile_run = perf.finish_run()
+if profile_run is not None and perf.ENABLED and is_admin:
+    with st.sidebar, st.expander("⏱️ Profiling Rerun"):
+        st.metric("Waktu rerun ini", f"{profile_run.total * 1000:.0f} ms")
+        spans = pd.DataFrame([{"Langkah": f"{'· ' * depth}{name} #{i}", "Mulai (ms)": start * 1000, "Durasi (ms)": duration * 1000}
+                              for i, (name, start, duration, depth) in enumerate(sorted(profile_run.spans, key=lambda s: s[1]))])
+        if not spans.empty:
+            fig_waterfall = px.bar(spans, x="Durasi (ms)", y="Langkah", base="Mulai (ms)", orientation='h', title="Waterfall rerun ini")
+            fig_waterfall.update_layout(yaxis={'autorange': 'reversed'}, showlegend=False, height=120 + 22 * len(spans))
+            st.plotly_chart(fig_waterfall, use_container_width=True)
+        st.caption("Jumlah panggilan: " + ", ".join(f"{name} ×{count}" for name, count in profile_run.calls.items()))
+        if profile_run.cache:
+            st.caption("Cache: " + ", ".join(f"{name} {hit} hit / {miss} miss" for name, (hit, miss) in profile_run.cache.items()))
+        figure_cache = FIGURE_CACHE.stats()
+        st.caption(f"Cache figur: {figure_cache['entries']} figur, {figure_cache['bytes'] / 1024:.0f} / {figure_cache['max_bytes'] / 1024:.0f} KB")
+        stats = pd.DataFrame(perf.rolling_stats()).rename(columns={"name": "Timer", "runs": "Rerun", "p50": "p50 (ms)", "p95": "p95 (ms)"})
+        stats[["p50 (ms)", "p95 (ms)"]] = (stats[["p50 (ms)", "p95 (ms)"]] * 1000).round(1)
+        st.dataframe(stats, hide_index=True, use_container_width=True)
+        if sqltrace.ENABLED:
+            st.caption(f"Statement SQL rerun ini: {profile_run.calls.get('sql', 0)}")
+            sql_stats = pd.DataFrame(sqltrace.stats()[:10])
+            if not sql_stats.empty:
+                sql_stats[["total", "max"]] = (sql_stats[["total", "max"]] * 1000).round(1)
+                st.dataframe(sql_stats.rename(columns={"total": "total (ms)", "max": "maks (ms)"}), hide_index=True, use_container_width=True)
+        st.download_button("📥 Unduh Data Profiling (JSON)", perf.dump_json(), "letstracker_profiling.json")
@@ -0,0 +1,97 @@
+"""Penulisan database Excel yang aman untuk banyak sesi (dipakai app.py, app1.py, app3.py).
+
+Setiap penulisan sheet dikunci dengan file lock antar-proses (berkas `<db>.lock`),
+lalu workbook disalin ke berkas sementara di direktori yang sama, diubah di sana,
+di-fsync, dan di-rename atomik menimpa berkas asli. Pembaca tidak perlu mengunci:
+mereka selalu melihat workbook lama atau baru secara utuh, tidak pernah setengah jadi.
+"""
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+LOCK_TIMEOUT = 30  # detik menunggu penulis lain sebelum menyerah
+# umask proses, dibaca sekali saat impor (os.umask tidak bisa dibaca tanpa mengubahnya)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def file_lock(path, timeout=LOCK_TIMEOUT):
+    """Kunci eksklusif antar-proses pada `<path>.lock`."""
+    with open(path + ".lock", "a+b") as lock_file:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if fcntl:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Database Excel sedang ditulis sesi lain: {path}")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _fsync_dir(directory):
+    if fcntl is None: return  # Windows tidak mendukung fsync direktori
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _replace(src, dst, retries=20):
+    # Di Windows, rename gagal selama pembaca masih membuka berkas tujuan
+    for attempt in range(retries):
+        try:
+            return os.replace(src, dst)
+        except PermissionError:
+            if attempt == retries - 1: raise
+            time.sleep(0.05)
+
+
+def write_sheet(db_file, df, sheet_name, if_sheet_exists="replace"):
+    """Menulis df ke satu sheet secara atomik; sheet lain di workbook tetap utuh."""
+    directory = os.path.dirname(os.path.abspath(db_file))
+    with file_lock(db_file):
+        fd, tmp_path = tempfile.mkstemp(prefix=".~", suffix=".xlsx", dir=directory)
+        os.close(fd)
+        try:
+            if os.path.exists(db_file):
+                shutil.copyfile(db_file, tmp_path)
+                writer = pd.ExcelWriter(tmp_path, mode="a", engine="openpyxl", if_sheet_exists=if_sheet_exists)
+            else:
+                writer = pd.ExcelWriter(tmp_path, mode="w", engine="openpyxl")
+            with writer:
+                df.to_excel(writer, sheet_name=sheet_name, index=False)
+            with open(tmp_path, "rb") as f:
+                os.fsync(f.fileno())
+            # mkstemp membuat berkas 0600; os.replace akan mempersempit izin workbook
+            if os.path.exists(db_file): shutil.copymode(db_file, tmp_path)
+            else: os.chmod(tmp_path, 0o666 & ~_UMASK)
+            _replace(tmp_path, db_file)
+            _fsync_dir(directory)
+        except BaseException:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+            raise
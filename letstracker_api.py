@@ -0,0 +1,160 @@
+"""API JSON baca-saja LetsTracker (stdlib http.server) untuk bot dan dasbor.
+
+Endpoint:
+    GET /api/leaderboard/weekly     Peringkat pekan ini
+    GET /api/leaderboard/monthly    Peringkat bulan ini + proyeksi akhir bulan
+    GET /api/leaderboard/history    Peringkat pekanan 8 pekan terakhir + perubahannya
+    GET /api/streaks                Streak ibadah harian semua peserta
+    GET /api/users                  Daftar peserta
+    GET /api/users/<nama>           Ringkasan dan proyeksi akhir bulan satu peserta
+    GET /api/groups                 Daftar grup dan pesertanya
+
+Endpoint laporan menerima ?grup=<nama> (default grup utama). Setiap respons membawa ETag
+dari versi data grup itu (meta 'versi_data:<grup>') dan tanggal acuan,
+sehingga klien yang mengirim If-None-Match mendapat 304 tanpa body. Selama berkas
+database tidak berubah (dicek lewat os.stat), SQLite sama sekali tidak disentuh.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+import letstracker_core as core
+
+
+def _records(df, rank=False):
+    df = df.rename_axis("Peringkat").reset_index() if rank else df
+    return df.to_dict(orient="records")
+
+
+def _db_stamp():
+    stamp = []
+    for path in (core.DB_FILE, core.DB_FILE + "-wal"):
+        try:
+            st = os.stat(path)
+            stamp.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
+class ReportCache:
+    """Menyimpan body JSON per path satu grup untuk satu (versi data grup, tanggal); dihitung ulang hanya saat berubah."""
+
+    def __init__(self, group=core.DEFAULT_GROUP):
+        self.group = group
+        self._lock = threading.Lock()
+        self._file_stamp = None
+        self._version = None
+        self._key = None
+        self._bodies = {}
+
+    def _current_key(self):
+        stamp = _db_stamp()
+        if stamp != self._file_stamp or self._version is None:
+            self._version = core.current_data_version(self.group)
+            self._file_stamp = stamp
+        return (self._version, datetime.now().date())
+
+    def _build(self, today):
+        report = core.build_group_report(today, self.group)
+        users = core.participants(self.group)
+        history = core.rank_history(today=today, group=self.group)
+        history["Perubahan"] = history["Perubahan"].astype(object).where(history["Perubahan"].notna(), None)
+        streaks = report["streak"].set_index("Peserta")
+        summaries = report["ringkasan_peserta"]
+        forecast = {user: rows.drop(columns="Peserta").set_index("Ibadah").to_dict(orient="index")
+                    for user, rows in report["proyeksi_bulanan"].groupby("Peserta")}
+        bodies = {
+            "/api/leaderboard/weekly": _records(report["leaderboard_pekanan"], rank=True),
+            "/api/leaderboard/monthly": _records(report["leaderboard_bulanan"], rank=True),
+            "/api/leaderboard/history": _records(history),
+            "/api/streaks": _records(report["streak"]),
+            "/api/users": users,
+        }
+        for user in users:
+            user_rows = summaries[summaries["Peserta"] == user]
+            bodies[f"/api/users/{user}"] = {
+                "Peserta": user,
+                "Streak": streaks.loc[user].to_dict() if user in streaks.index else {},
+                "Ringkasan": {period: dict(zip(rows["Ibadah"], rows["Capaian (%)"].round(2)))
+                              for period, rows in user_rows.groupby("Periode")},
+                "Proyeksi": forecast.get(user, {}),
+            }
+        return {path: json.dumps({"tanggal": today.isoformat(), "grup": self.group, "data": body}, ensure_ascii=False, default=str).encode("utf-8")
+                for path, body in bodies.items()}
+
+    def get(self, path):
+        """(etag, body) untuk path, atau (etag, None) bila path tidak dikenal."""
+        with self._lock:
+            key = self._current_key()
+            if key != self._key:
+                self._bodies = self._build(key[1])
+                self._key = key
+            return f'"{key[0]}-{key[1].isoformat()}"', self._bodies.get(path)
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    caches = {}
+    _caches_lock = threading.Lock()
+    _groups, _groups_stamp = None, None
+
+    @classmethod
+    def groups(cls):
+        """Grup -> tuple peserta; registri hanya dibaca ulang setelah berkas database berubah."""
+        stamp = _db_stamp()
+        with cls._caches_lock:
+            if stamp != cls._groups_stamp or cls._groups is None:
+                cls._groups, cls._groups_stamp = core.registry(refresh=True).groups, stamp
+            return cls._groups
+
+    @classmethod
+    def cache_for(cls, group):
+        """ReportCache grup (dibuat saat pertama diminta), None bila grup tidak ada di registri."""
+        if group not in cls.groups(): return None
+        with cls._caches_lock:
+            return cls.caches.setdefault(group, ReportCache(group))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = unquote(url.path).rstrip("/")
+        if path == "/api/groups":
+            return self._send(200, json.dumps({"data": {group: list(members) for group, members in self.groups().items()}}, ensure_ascii=False).encode("utf-8"))
+        group = parse_qs(url.query).get("grup", [core.DEFAULT_GROUP])[0]
+        cache = self.cache_for(group)
+        if cache is None:
+            return self._send(404, json.dumps({"error": f"grup {group} tidak dikenal"}, ensure_ascii=False).encode("utf-8"))
+        etag, body = cache.get(path)
+        if body is None:
+            return self._send(404, json.dumps({"error": "tidak ditemukan"}).encode("utf-8"))
+        if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+            return self._send(304, None, etag)
+        self._send(200, body, etag)
+
+    def _send(self, status, body, etag=None):
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if body is not None:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body is not None:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host="127.0.0.1", port=8765):
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    print(f"API LetsTracker berjalan di http://{host}:{port}/api/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
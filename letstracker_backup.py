@@ -0,0 +1,184 @@
+"""Backup online database LetsTracker lewat SQLite backup API.
+
+Salinan diambil per potongan halaman (BACKUP_PAGES) dengan jeda di antara langkah, jadi
+kunci baca pada database sumber hanya dipegang sebentar dan upsert_data tidak tertahan
+lama. Bila sumber terus berubah selama salinan berjalan, SQLite memulai ulang backup; setelah
+BACKUP_MAX_RESTARTS kali salinan diambil dalam satu langkah. Hasilnya dikompresi (gzip),
+disertai berkas .sha256 (format sha256sum), dan hanya `keep` snapshot terbaru yang disimpan.
+Statistik tiap backup (durasi, jumlah langkah, langkah terlama = batas atas tertahannya
+penulis) ditambahkan ke backup_log.ndjson di direktori backup.
+
+Berkas arsip tahunan (archive_year) tidak berubah setelah dibuat, jadi cukup disalin sekali
+dan tidak ikut snapshot.
+"""
+import glob
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+import letstracker_core as core
+from letstracker_perf import timed
+
+BACKUP_DIR = os.environ.get("LETSTRACKER_BACKUP_DIR", "backups")
+BACKUP_KEEP = 7
+BACKUP_PAGES = 64
+BACKUP_PAUSE = 0.02
+BACKUP_MAX_RESTARTS = 3
+_CHUNK = 1024 * 1024
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _copy_online(dest_file, pages, pause):
+    """Menyalin database aktif ke dest_file; mengembalikan (jumlah langkah, langkah terlama, restart)."""
+    state = {"steps": 0, "restarts": 0, "remaining": None, "last": time.perf_counter(), "max_step": 0.0}
+
+    def progress(status, remaining, total):
+        now = time.perf_counter()
+        state["max_step"] = max(state["max_step"], now - state["last"])
+        state["steps"] += 1
+        if state["remaining"] is not None and remaining > state["remaining"]:
+            state["restarts"] += 1
+            if state["restarts"] > BACKUP_MAX_RESTARTS: raise _TooManyRestarts()
+        state["remaining"] = remaining
+        if remaining and pause: time.sleep(pause)
+        state["last"] = time.perf_counter()
+
+    src = core.connect()
+    try:
+        for step_pages in (pages, -1):
+            dest = sqlite3.connect(dest_file)
+            try:
+                src.backup(dest, pages=step_pages, progress=progress)
+                return state["steps"], state["max_step"], state["restarts"]
+            except _TooManyRestarts:
+                state.update(remaining=None, last=time.perf_counter())
+            finally:
+                dest.close()
+    finally:
+        src.close()
+
+
+def _snapshot_name(stamp):
+    stem = os.path.splitext(os.path.basename(core.DB_FILE))[0]
+    return f"{stem}-{stamp}.db.gz"
+
+
+def list_backups(dest_dir=BACKUP_DIR):
+    """Snapshot di dest_dir, terbaru lebih dulu."""
+    stem = os.path.splitext(os.path.basename(core.DB_FILE))[0]
+    return sorted(glob.glob(os.path.join(dest_dir, f"{stem}-*.db.gz")), reverse=True)
+
+
+def rotate(dest_dir=BACKUP_DIR, keep=BACKUP_KEEP):
+    removed = []
+    for path in list_backups(dest_dir)[keep:]:
+        for victim in (path, path + ".sha256"):
+            if os.path.exists(victim): os.remove(victim)
+        removed.append(path)
+    return removed
+
+
+@timed("backup")
+def create_backup(dest_dir=BACKUP_DIR, keep=BACKUP_KEEP, pages=BACKUP_PAGES, pause=BACKUP_PAUSE):
+    """Membuat satu snapshot terkompresi + checksum, lalu merotasi snapshot lama; mengembalikan statistik."""
+    os.makedirs(dest_dir, exist_ok=True)
+    start = time.perf_counter()
+    path = os.path.join(dest_dir, _snapshot_name(datetime.now().strftime("%Y%m%d-%H%M%S-%f")))
+    fd, raw = tempfile.mkstemp(suffix=".db", dir=dest_dir)
+    os.close(fd)
+    try:
+        steps, max_step, restarts = _copy_online(raw, pages, pause)
+        copied = time.perf_counter()
+        with open(raw, "rb") as src, gzip.open(path + ".tmp", "wb", compresslevel=6) as dest:
+            shutil.copyfileobj(src, dest, _CHUNK)
+        raw_bytes = os.path.getsize(raw)
+    finally:
+        os.remove(raw)
+    os.replace(path + ".tmp", path)
+    checksum = _sha256(path)
+    with open(path + ".sha256", "w", encoding="utf-8") as f:
+        f.write(f"{checksum}  {os.path.basename(path)}\n")
+    stats = {"path": path, "created_at": datetime.now().isoformat(timespec="seconds"), "bytes": os.path.getsize(path),
+             "raw_bytes": raw_bytes, "sha256": checksum, "steps": steps, "restarts": restarts, "max_step_seconds": max_step,
+             "copy_seconds": copied - start, "seconds": time.perf_counter() - start, "removed": rotate(dest_dir, keep)}
+    with open(os.path.join(dest_dir, "backup_log.ndjson"), "a", encoding="utf-8") as f:
+        f.write(json.dumps(stats) + "\n")
+    return stats
+
+
+def _decompress(path, dest_dir):
+    fd, raw = tempfile.mkstemp(suffix=".db", dir=dest_dir)
+    with os.fdopen(fd, "wb") as dest, gzip.open(path, "rb") as src:
+        shutil.copyfileobj(src, dest, _CHUNK)
+    return raw
+
+
+@timed("verify_backup")
+def verify_backup(path):
+    """Cek checksum .sha256 dan PRAGMA integrity_check snapshot; ValueError bila rusak."""
+    sidecar = path + ".sha256"
+    if not os.path.exists(sidecar): raise ValueError(f"Berkas checksum {sidecar} tidak ditemukan.")
+    with open(sidecar, encoding="utf-8") as f:
+        expected = f.read().split()[0]
+    if _sha256(path) != expected: raise ValueError(f"Checksum {os.path.basename(path)} tidak cocok.")
+    raw = _decompress(path, os.path.dirname(os.path.abspath(path)))
+    try:
+        conn = sqlite3.connect(raw)
+        result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        rows = conn.execute("SELECT COUNT(*) FROM progress").fetchone()[0] if result == "ok" else None
+        conn.close()
+    finally:
+        os.remove(raw)
+    if result != "ok": raise ValueError(f"integrity_check gagal: {result}")
+    return {"path": path, "sha256": expected, "rows": rows}
+
+
+def _version_counters(conn):
+    """Penghitung versi di meta (versi_data, versi_data:<grup>, versi_riwayat*, versi_registri)."""
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'meta'").fetchone() is None: return {}
+    return dict(conn.execute("SELECT key, value FROM meta WHERE key LIKE 'versi\\_%' ESCAPE '\\'").fetchall())
+
+
+@timed("restore_backup")
+def restore_backup(path, target=None):
+    """Memverifikasi snapshot lalu menyalinnya ke target (default DB_FILE) lewat backup API.
+
+    Penyalinan memakai koneksi SQLite, bukan menimpa berkas, sehingga koneksi lain yang sedang
+    terbuka langsung melihat isi hasil restore secara konsisten. Penghitung versi di meta diset ke
+    max(sebelum restore, isi snapshot) + 1 supaya semua cache yang dikunci versi menjadi usang.
+    """
+    verify_backup(path)
+    target = target or core.DB_FILE
+    raw = _decompress(path, os.path.dirname(os.path.abspath(target)))
+    try:
+        src, dest = sqlite3.connect(raw), sqlite3.connect(target)
+        live = _version_counters(dest)
+        src.backup(dest)
+        restored = _version_counters(dest)
+        # Penghitung versi tidak boleh mundur: nomor yang sudah pernah dibagikan (ETag API, kunci
+        # cache Streamlit, snapshot scheduler) akan dipakai ulang untuk isi yang berbeda
+        dest.executemany("INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                         [(key, max(live.get(key, 0), restored.get(key, 0)) + 1) for key in set(live) | set(restored) | {"versi_registri"}])
+        dest.commit()
+        dest.close()
+        src.close()
+    finally:
+        os.remove(raw)
+    return target
@@ -0,0 +1,58 @@
+"""Pembuatan laporan Excel/PDF semua peserta secara paralel (process pool).
+
+Data dibaca sekali, lalu tiap peserta diproses di worker terpisah memakai fungsi
+yang sama dengan tombol unduh di app4.py, sehingga isi berkasnya identik.
+"""
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import letstracker_core as core
+
+
+def generate_user_reports(username, df):
+    """Worker: (nama, {nama_berkas: bytes}, {jenis: detik})."""
+    timings, files = {}, {}
+    start = time.perf_counter()
+    files[f"semua_progress_{username}.xlsx"] = core.user_excel_bytes(df, username)
+    timings["excel"] = time.perf_counter() - start
+    start = time.perf_counter()
+    files[f"semua_progress_{username}.pdf"] = core.df_to_pdf(df, f"Laporan Lengkap - {username}")
+    timings["pdf"] = time.perf_counter() - start
+    return username, files, timings
+
+
+def run_batch_reports(out, workers=None, as_zip=False, log=sys.stderr):
+    """Membuat laporan semua PARTICIPANTS ke direktori `out` (atau berkas zip bila as_zip)."""
+    start = time.perf_counter()
+    frames = core.split_by_user(core.load_all_user_data())
+    jobs = [(user, frames[user]) for user in core.PARTICIPANTS if user in frames]
+    load_seconds = time.perf_counter() - start
+    print(f"Data dimuat dalam {load_seconds:.2f} detik, {len(jobs)} peserta", file=log)
+
+    if as_zip:
+        archive = zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED)
+    else:
+        os.makedirs(out, exist_ok=True)
+    timings = {}
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(generate_user_reports, user, df) for user, df in jobs]
+            for done, future in enumerate(as_completed(futures), start=1):
+                username, files, user_timings = future.result()
+                for name, data in files.items():
+                    if as_zip:
+                        archive.writestr(name, data)
+                    else:
+                        with open(os.path.join(out, name), "wb") as f:
+                            f.write(data)
+                timings[username] = user_timings
+                print(f"[{done}/{len(jobs)}] {username}: excel {user_timings['excel']:.2f} dtk, "
+                      f"pdf {user_timings['pdf']:.2f} dtk", file=log)
+    finally:
+        if as_zip: archive.close()
+    elapsed = time.perf_counter() - start
+    print(f"{len(jobs) * 2} laporan selesai dalam {elapsed:.2f} detik", file=log)
+    return {"reports": len(jobs) * 2, "seconds": elapsed, "load_seconds": load_seconds, "per_user": timings}
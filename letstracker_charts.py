@@ -0,0 +1,184 @@
+"""Figure Plotly yang dibangun dari agregat siap pakai (bukan dari frame mentah per hari).
+
+Heatmap kalender memakai satu trace go.Heatmap dari matriks completion_matrix(), sehingga
+waktu render tidak bergantung pada jumlah sel (tidak ada shape per hari).
+
+Figure ringkasan dan leaderboard lewat FIGURE_CACHE: kunci = hash isi frame agregat kecil +
+opsi chart, sehingga rerun dengan angka yang sama tidak membangun ulang figure Plotly Express.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+import letstracker_perf as perf
+import letstracker_core as core
+from letstracker_perf import timed
+
+HARI = ["Sen", "Sel", "Rab", "Kam", "Jum", "Sab", "Min"]
+HEATMAP_COLORSCALE = [[0.0, "#ebedf0"], [0.25, "#9be9a8"], [0.5, "#40c463"], [0.75, "#30a14e"], [1.0, "#216e39"]]
+
+
+@timed("calendar_heatmap")
+def calendar_heatmap(days, counts, title=""):
+    """Heatmap gaya GitHub untuk satu peserta: baris = hari (Sen..Min), kolom = pekan."""
+    offset = np.arange(len(days)) + days[0].weekday()
+    n_weeks = offset[-1] // 7 + 1
+    z = np.full((7, n_weeks), np.nan)
+    text = np.full((7, n_weeks), "", dtype=object)
+    z[offset % 7, offset // 7] = counts
+    text[offset % 7, offset // 7] = days.strftime('%d %b %Y')
+    week_starts = (days[0] - np.timedelta64(days[0].weekday(), 'D')) + np.arange(n_weeks) * np.timedelta64(7, 'D')
+    fig = go.Figure(go.Heatmap(
+        z=z, x=week_starts, y=HARI, text=text, xgap=2, ygap=2, zmin=0, zmax=len(core.registry().habits),
+        colorscale=HEATMAP_COLORSCALE, hovertemplate="%{text}: %{z} ibadah<extra></extra>", showscale=False,
+    ))
+    fig.update_layout(title=title, height=220, margin=dict(l=40, r=10, t=40 if title else 10, b=20),
+                      yaxis=dict(autorange="reversed", fixedrange=True), xaxis=dict(fixedrange=True), plot_bgcolor="white")
+    return fig
+
+
+@timed("group_heatmap")
+def group_heatmap(users, days, matrix, title=""):
+    """Heatmap grup: baris = peserta, kolom = hari, nilai = jumlah ibadah yang dikerjakan."""
+    fig = go.Figure(go.Heatmap(
+        z=matrix, x=days, y=users, zmin=0, zmax=len(core.registry().habits), colorscale=HEATMAP_COLORSCALE,
+        hovertemplate="%{y}, %{x|%d %b %Y}: %{z} ibadah<extra></extra>", colorbar=dict(title="Ibadah"),
+    ))
+    fig.update_layout(title=title, height=max(250, 22 * len(users) + 80), margin=dict(l=10, r=10, t=40 if title else 10, b=20),
+                      yaxis=dict(autorange="reversed"), plot_bgcolor="white")
+    return fig
+
+
+class FigureCache:
+    """Cache LRU figure Plotly, dibatasi total ukuran spec JSON (byte); aman dipakai lintas sesi.
+
+    Figure yang dikembalikan dipakai bersama antar-rerun/sesi: perlakukan sebagai read-only.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # kunci -> (figure, ukuran spec)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(name, frame, options):
+        digest = hashlib.sha1(name.encode())
+        digest.update(repr(sorted(options.items())).encode())
+        digest.update(repr(list(frame.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+        return digest.hexdigest()
+
+    def get_or_build(self, name, frame, build, **options):
+        key = self.key(name, frame, options)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None: self._entries.move_to_end(key)
+        perf.record_cache(f"figure_{name}", entry is not None)
+        if entry is not None: return entry[0]
+        with timed(f"figure_{name}"):
+            figure = build(frame, **options)
+            size = len(figure.to_json())
+        with self._lock:
+            if key not in self._entries and size <= self.max_bytes:
+                self._entries[key] = (figure, size)
+                self._size += size
+                while self._size > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._size -= evicted
+        return figure
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "max_bytes": self.max_bytes}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+FIGURE_CACHE = FigureCache(int(float(os.environ.get("LETSTRACKER_FIGURE_CACHE_MB", "32")) * 1024 * 1024))
+
+
+def _progress_bar(df_progress):
+    fig = px.bar(df_progress, x="Capaian (%)", y="Ibadah", orientation='h', text="Capaian (%)", color="Ibadah", color_discrete_sequence=px.colors.qualitative.Pastel)
+    fig.update_traces(texttemplate='%{x:.0f}%')
+    fig.update_layout(xaxis_range=[0, 100], yaxis={'categoryorder': 'total ascending'}, showlegend=False)
+    return fig
+
+
+def _progress_pie(df_status):
+    return px.pie(df_status, values="Jumlah", names="Status", hole=0.4, color_discrete_map={"Selesai": "mediumseagreen", "Belum": "lightgray"})
+
+
+def _leaderboard_bar(lb_df, title=""):
+    fig = px.bar(lb_df, x="Progress (%)", y="Peserta", orientation='h', title=title, text='Progress (%)', color="Peserta")
+    fig.update_layout(yaxis={'categoryorder': 'total descending'}, xaxis_range=[0, 100], showlegend=False)
+    return fig
+
+
+def _rank_bump(history, title=""):
+    fig = px.line(history, x="Pekan", y="Peringkat", color="Peserta", markers=True, title=title,
+                  hover_data={"Progress (%)": ':.1f', "Perubahan": True})
+    fig.update_layout(yaxis={'autorange': 'reversed', 'dtick': 1, 'title': "Peringkat"}, xaxis_title=None, hovermode="closest")
+    return fig
+
+
+def _forecast_bar(forecast, title=""):
+    frame = forecast.assign(atas=forecast["Batas Atas (%)"] - forecast["Proyeksi (%)"], bawah=forecast["Proyeksi (%)"] - forecast["Batas Bawah (%)"])
+    fig = px.bar(frame, x="Proyeksi (%)", y="Ibadah", orientation='h', title=title, color="Status", error_x="atas", error_x_minus="bawah",
+                 color_discrete_map={core.FORECAST_ON_TRACK: "mediumseagreen", core.FORECAST_AT_RISK: "indianred"},
+                 hover_data={"Capaian (%)": True, "Batas Bawah (%)": True, "Batas Atas (%)": True, "atas": False, "bawah": False})
+    fig.add_vline(x=core.FORECAST_ON_TRACK_PCT, line_dash="dash", line_color="gray")
+    fig.update_layout(yaxis={'categoryorder': 'total ascending', 'title': None}, legend_title=None)
+    return fig
+
+
+def _habit_matrix(frame, title="", center=None):
+    # center: nilai netral skala divergen (mis. lift 1); tanpa center skala hijau 0..maksimum
+    colors = dict(colorscale="RdBu", zmid=center) if center is not None else dict(colorscale=HEATMAP_COLORSCALE[1:], zmin=0)
+    fig = go.Figure(go.Heatmap(
+        z=frame.to_numpy(), x=list(frame.columns), y=list(frame.index), texttemplate="%{z}",
+        hovertemplate="%{y} → %{x}: %{z}<extra></extra>", **colors,
+    ))
+    fig.update_layout(title=title, height=max(300, 45 * len(frame) + 120), margin=dict(l=10, r=10, t=40 if title else 10, b=20),
+                      yaxis=dict(autorange="reversed"), xaxis=dict(tickangle=-30), plot_bgcolor="white")
+    return fig
+
+
+def progress_bar(df_progress):
+    """Bar horizontal capaian per ibadah (hasil progress_summary)."""
+    return FIGURE_CACHE.get_or_build("progress_bar", df_progress, _progress_bar)
+
+
+def progress_pie(total_actual, total_target):
+    """Donat Selesai/Belum untuk progress keseluruhan."""
+    df_status = pd.DataFrame({"Status": ["Selesai", "Belum"], "Jumlah": [total_actual, max(0, total_target - total_actual)]})
+    return FIGURE_CACHE.get_or_build("progress_pie", df_status, _progress_pie)
+
+
+def leaderboard_bar(lb_df, title=""):
+    """Bar horizontal leaderboard (Peserta/Progress (%))."""
+    return FIGURE_CACHE.get_or_build("leaderboard_bar", lb_df, _leaderboard_bar, title=title)
+
+
+def rank_bump(history, title=""):
+    """Bump chart peringkat pekanan per peserta (hasil rank_history); peringkat 1 di atas."""
+    return FIGURE_CACHE.get_or_build("rank_bump", history, _rank_bump, title=title)
+
+
+def forecast_bar(forecast, title=""):
+    """Bar proyeksi akhir bulan per ibadah dengan pita keyakinan (baris month_end_forecast satu peserta)."""
+    return FIGURE_CACHE.get_or_build("forecast_bar", forecast, _forecast_bar, title=title)
+
+
+def habit_matrix(frame, title="", center=None):
+    """Heatmap ibadah x ibadah (salah satu frame HabitCooccurrence.frames); baris = A, kolom = B."""
+    return FIGURE_CACHE.get_or_build("habit_matrix", frame, _habit_matrix, title=title, center=center)
@@ -0,0 +1,288 @@
+"""CLI LetsTracker untuk job terjadwal (cron), tanpa Streamlit.
+
+Contoh:
+    python letstracker_cli.py report --out laporan/
+    python letstracker_cli.py export --format ndjson --since 120 --out delta.ndjson
+    python letstracker_cli.py export-excel --out semua_peserta.xlsx
+    python letstracker_cli.py reports --out laporan_peserta.zip --zip --workers 4
+    python letstracker_cli.py serve --port 8765
+    python letstracker_cli.py rebuild-streaks
+    python letstracker_cli.py archive 2024 --vacuum
+    python letstracker_cli.py backup --out backups/ --keep 14
+    python letstracker_cli.py restore backups/letstracker-20250101-020000-000000.db.gz --yes
+    python letstracker_cli.py audit Sahrul --at 2025-03-01T21:00
+    python letstracker_cli.py peserta tambah "Bang Fikri" --grup halaqah2
+    python letstracker_cli.py ibadah target Olahraga 4
+    python letstracker_cli.py belum-isi --grup halaqah2
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import letstracker_core as core
+import letstracker_batch
+import letstracker_api
+import letstracker_backup
+
+
+def _peak_memory_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def cmd_report(args):
+    start = time.perf_counter()
+    if args.grup and args.grup not in core.registry().groups: sys.exit(f"Grup {args.grup} tidak terdaftar.")
+    today = datetime.strptime(args.tanggal, '%Y-%m-%d').date() if args.tanggal else None
+    report = core.build_group_report(today, args.grup)
+    os.makedirs(args.out, exist_ok=True)
+    bundle = {"tanggal": report["tanggal"].isoformat(), "grup": args.grup}
+    for name in ["leaderboard_pekanan", "leaderboard_bulanan", "streak", "ringkasan_peserta", "proyeksi_bulanan"]:
+        report[name].to_csv(os.path.join(args.out, f"{name}.csv"), index=False)
+        bundle[name] = report[name].to_dict(orient="records")
+    with open(os.path.join(args.out, "laporan.json"), "w", encoding="utf-8") as f:
+        json.dump(bundle, f, ensure_ascii=False, indent=2, default=str)
+    peak = _peak_memory_mb()
+    print(f"Laporan {bundle['tanggal']} ditulis ke {args.out} dalam {time.perf_counter() - start:.2f} detik"
+          + (f" (memori puncak {peak:.0f} MB)" if peak else ""), file=sys.stderr)
+
+
+def cmd_export(args):
+    version = core.current_data_version()
+    out = open(args.out, "w", encoding="utf-8", newline="") if args.out else sys.stdout
+    try:
+        for chunk in core.iter_progress_export(args.format, since=args.since):
+            out.write(chunk)
+    finally:
+        if args.out: out.close()
+    print(f"Penanda versi untuk ekspor berikutnya: {version}", file=sys.stderr)
+
+
+def cmd_export_excel(args):
+    stats = core.export_all_participants_excel(args.out)
+    print(f"{stats['rows']} baris, {stats['sheets']} sheet dalam {stats['seconds']:.2f} detik "
+          f"({stats['rows_per_sec']:,.0f} baris/detik)", file=sys.stderr)
+
+
+def cmd_reports(args):
+    letstracker_batch.run_batch_reports(args.out, workers=args.workers, as_zip=args.zip)
+
+
+def cmd_serve(args):
+    letstracker_api.serve(args.host, args.port)
+
+
+def cmd_rebuild_streaks(args):
+    start = time.perf_counter()
+    core.rebuild_streaks()
+    print(f"Tabel streaks dibangun ulang dalam {time.perf_counter() - start:.2f} detik", file=sys.stderr)
+
+
+def cmd_archive(args):
+    if args.list:
+        for year in core.archived_years():
+            print(f"{year}\t{core.archive_path(year)}")
+        return
+    if args.tahun is None: sys.exit("Sebutkan tahun yang akan diarsipkan (atau --list).")
+    start = time.perf_counter()
+    try:
+        moved = core.archive_year(args.tahun, vacuum=args.vacuum)
+    except ValueError as e:
+        sys.exit(str(e))
+    print(f"{moved} baris tahun {args.tahun} dipindah ke {core.archive_path(args.tahun)} dalam {time.perf_counter() - start:.2f} detik", file=sys.stderr)
+
+
+def cmd_unarchive(args):
+    try:
+        restored = core.unarchive_year(args.tahun)
+    except ValueError as e:
+        sys.exit(str(e))
+    print(f"{restored} baris tahun {args.tahun} dikembalikan ke {core.DB_FILE}", file=sys.stderr)
+
+
+def cmd_backup(args):
+    stats = letstracker_backup.create_backup(args.out, keep=args.keep, pages=args.pages, pause=args.pause)
+    print(f"{stats['path']}: {stats['raw_bytes'] / 1024:.0f} KB -> {stats['bytes'] / 1024:.0f} KB dalam {stats['seconds']:.2f} detik "
+          f"({stats['steps']} langkah, terlama {stats['max_step_seconds'] * 1000:.1f} ms, restart {stats['restarts']})", file=sys.stderr)
+    for path in stats["removed"]:
+        print(f"dihapus (rotasi): {path}", file=sys.stderr)
+
+
+def cmd_verify(args):
+    paths = args.berkas or letstracker_backup.list_backups(args.dir)
+    failed = False
+    for path in paths:
+        try:
+            result = letstracker_backup.verify_backup(path)
+            print(f"OK     {path} ({result['rows']} baris)")
+        except (ValueError, OSError) as e:
+            failed = True
+            print(f"GAGAL  {path}: {e}")
+    if failed: sys.exit(1)
+
+
+def cmd_restore(args):
+    if not args.yes:
+        sys.exit(f"Restore akan menimpa isi {args.target or core.DB_FILE}; ulangi dengan --yes untuk melanjutkan.")
+    try:
+        target = letstracker_backup.restore_backup(args.berkas, target=args.target)
+    except ValueError as e:
+        sys.exit(str(e))
+    print(f"{args.berkas} dipulihkan ke {target}", file=sys.stderr)
+
+
+def cmd_audit(args):
+    if args.at:
+        try:
+            state = core.reconstruct_state(args.peserta, datetime.fromisoformat(args.at))
+        except ValueError as e:
+            sys.exit(str(e))
+        state.to_csv(sys.stdout, index=False)
+    else:
+        core.audit_history(args.peserta, args.limit).to_csv(sys.stdout, index=False)
+
+
+def cmd_peserta(args):
+    if args.aksi != "list" and not args.nama: sys.exit("Sebutkan nama peserta.")
+    try:
+        if args.aksi == "tambah":
+            group = core.add_participant(args.nama, args.grup or core.DEFAULT_GROUP)
+            print(f"Peserta {args.nama} terdaftar di grup {group}", file=sys.stderr)
+        elif args.aksi in ("aktif", "nonaktif"):
+            core.set_participant_active(args.nama, args.aksi == "aktif")
+            print(f"Peserta {args.nama} di{args.aksi}kan", file=sys.stderr)
+    except ValueError as e:
+        sys.exit(str(e))
+    if args.aksi == "list":
+        reg = core.registry()
+        active = set(reg.participants)
+        for name, user_id in reg.user_ids.items():
+            print(f"{user_id}\t{name}\t{reg.user_groups[name]}\t{'aktif' if name in active else 'nonaktif'}")
+
+
+def cmd_ibadah(args):
+    try:
+        if args.aksi == "tambah":
+            if not args.nama or not args.frekuensi: sys.exit("Sebutkan nama ibadah dan --frekuensi.")
+            core.add_habit(args.nama, args.frekuensi, args.target)
+            print(f"Ibadah {args.nama} ditambahkan", file=sys.stderr)
+        elif args.aksi == "target":
+            if not args.nama or args.target is None: sys.exit("Sebutkan nama ibadah dan targetnya.")
+            core.set_habit_target(args.nama, args.target)
+            print(f"Target {args.nama} menjadi {args.target}", file=sys.stderr)
+    except ValueError as e:
+        sys.exit(str(e))
+    if args.aksi == "list":
+        reg = core.registry()
+        for habit, freq in reg.habits.items():
+            print(f"{reg.habit_bits[habit] + 1}\t{habit}\t{freq}\t{reg.targets.get(habit, '')}")
+
+
+def cmd_missing(args):
+    if args.grup and args.grup not in core.registry().groups: sys.exit(f"Grup {args.grup} tidak terdaftar.")
+    day = datetime.strptime(args.tanggal, '%Y-%m-%d').date() if args.tanggal else datetime.now().date()
+    core.missing_entries(day, args.grup).to_csv(sys.stdout, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LetsTracker tanpa UI: laporan dan ekspor untuk job terjadwal.")
+    parser.add_argument("--db", help=f"Berkas database SQLite (default: {core.DB_FILE})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_report = sub.add_parser("report", help="Leaderboard pekanan/bulanan, streak, dan ringkasan semua peserta")
+    p_report.add_argument("--out", default="laporan", help="Direktori keluaran")
+    p_report.add_argument("--tanggal", help="Tanggal acuan YYYY-MM-DD (default: hari ini); streak selalu keadaan terkini")
+    p_report.add_argument("--grup", help="Hanya peserta satu grup (default: semua grup)")
+    p_report.set_defaults(func=cmd_report)
+
+    p_export = sub.add_parser("export", help="Ekspor tabel progress ke CSV/NDJSON (streaming)")
+    p_export.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    p_export.add_argument("--since", type=int, help="Hanya perubahan setelah penanda versi ini")
+    p_export.add_argument("--out", help="Berkas keluaran (default: stdout)")
+    p_export.set_defaults(func=cmd_export)
+
+    p_excel = sub.add_parser("export-excel", help="Excel semua peserta, satu sheet per peserta + Ringkasan")
+    p_excel.add_argument("--out", default="semua_progress_peserta.xlsx")
+    p_excel.set_defaults(func=cmd_export_excel)
+
+    p_reports = sub.add_parser("reports", help="Laporan Excel + PDF per peserta secara paralel")
+    p_reports.add_argument("--out", default="laporan_peserta", help="Direktori keluaran (atau berkas .zip dengan --zip)")
+    p_reports.add_argument("--zip", action="store_true", help="Tulis semua laporan ke satu berkas zip")
+    p_reports.add_argument("--workers", type=int, help="Jumlah proses (default: jumlah core CPU)")
+    p_reports.set_defaults(func=cmd_reports)
+
+    p_serve = sub.add_parser("serve", help="API JSON baca-saja (leaderboard, streak, ringkasan) dengan ETag")
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8765)
+    p_serve.set_defaults(func=cmd_serve)
+
+    p_streaks = sub.add_parser("rebuild-streaks", help="Hitung ulang tabel streaks dari seluruh riwayat")
+    p_streaks.set_defaults(func=cmd_rebuild_streaks)
+
+    p_archive = sub.add_parser("archive", help="Pindahkan data satu tahun yang sudah selesai ke berkas arsip terpisah")
+    p_archive.add_argument("tahun", type=int, nargs="?")
+    p_archive.add_argument("--list", action="store_true", help="Tampilkan tahun yang sudah diarsipkan")
+    p_archive.add_argument("--vacuum", action="store_true", help="VACUUM database utama setelah dipindah")
+    p_archive.set_defaults(func=cmd_archive)
+
+    p_unarchive = sub.add_parser("unarchive", help="Kembalikan data tahun arsip ke database utama")
+    p_unarchive.add_argument("tahun", type=int)
+    p_unarchive.set_defaults(func=cmd_unarchive)
+
+    p_backup = sub.add_parser("backup", help="Snapshot online terkompresi + checksum, dengan rotasi")
+    p_backup.add_argument("--out", default=letstracker_backup.BACKUP_DIR, help="Direktori backup")
+    p_backup.add_argument("--keep", type=int, default=letstracker_backup.BACKUP_KEEP, help="Jumlah snapshot yang disimpan")
+    p_backup.add_argument("--pages", type=int, default=letstracker_backup.BACKUP_PAGES, help="Halaman per langkah salin")
+    p_backup.add_argument("--pause", type=float, default=letstracker_backup.BACKUP_PAUSE, help="Jeda antar langkah (detik)")
+    p_backup.set_defaults(func=cmd_backup)
+
+    p_verify = sub.add_parser("verify", help="Cek checksum dan integrity_check snapshot")
+    p_verify.add_argument("berkas", nargs="*", help="Snapshot .db.gz (default: semua di --dir)")
+    p_verify.add_argument("--dir", default=letstracker_backup.BACKUP_DIR)
+    p_verify.set_defaults(func=cmd_verify)
+
+    p_restore = sub.add_parser("restore", help="Pulihkan database dari snapshot yang lolos verifikasi")
+    p_restore.add_argument("berkas")
+    p_restore.add_argument("--target", help="Database tujuan (default: --db)")
+    p_restore.add_argument("--yes", action="store_true", help="Konfirmasi penimpaan database tujuan")
+    p_restore.set_defaults(func=cmd_restore)
+
+    p_audit = sub.add_parser("audit", help="Riwayat perubahan peserta, atau isi jurnalnya pada waktu tertentu")
+    p_audit.add_argument("peserta")
+    p_audit.add_argument("--at", help="Rekonstruksi isi jurnal pada waktu ini (ISO, mis. 2025-03-01T21:00)")
+    p_audit.add_argument("--limit", type=int, default=50, help="Jumlah perubahan terbaru yang ditampilkan")
+    p_audit.set_defaults(func=cmd_audit)
+
+    p_peserta = sub.add_parser("peserta", help="Daftar, tambah, atau (non)aktifkan peserta di registri")
+    p_peserta.add_argument("aksi", choices=["list", "tambah", "aktif", "nonaktif"])
+    p_peserta.add_argument("nama", nargs="?")
+    p_peserta.add_argument("--grup", help=f"Grup peserta baru (default: {core.DEFAULT_GROUP})")
+    p_peserta.set_defaults(func=cmd_peserta)
+
+    p_ibadah = sub.add_parser("ibadah", help="Daftar ibadah, tambah ibadah, atau ubah target pekanan/bulanan")
+    p_ibadah.add_argument("aksi", choices=["list", "tambah", "target"])
+    p_ibadah.add_argument("nama", nargs="?")
+    p_ibadah.add_argument("target", type=int, nargs="?", help="Target per pekan/bulan (aksi target)")
+    p_ibadah.add_argument("--frekuensi", choices=list(core.HABIT_FREQUENCIES), help="Frekuensi ibadah baru")
+    p_ibadah.set_defaults(func=cmd_ibadah)
+
+    p_missing = sub.add_parser("belum-isi", help="Peserta yang belum mengisi / belum lengkap ibadah hariannya")
+    p_missing.add_argument("--tanggal", help="Tanggal YYYY-MM-DD (default: hari ini)")
+    p_missing.add_argument("--grup", help="Hanya peserta satu grup (default: semua grup)")
+    p_missing.set_defaults(func=cmd_missing)
+
+    args = parser.parse_args(argv)
+    if args.db: core.DB_FILE = args.db
+    core.init_db()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1388 @@
+"""Inti LetsTracker: penyimpanan SQLite, agregasi, dan ekspor tanpa Streamlit.
+
+Dipakai oleh app4.py (UI) dan letstracker_cli.py (job terjadwal/cron).
+"""
+import numpy as np
+import pandas as pd
+from datetime import date as date_cls, datetime, timedelta
+import os
+import io
+import time
+import csv
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import zlib
+from dataclasses import dataclass
+from types import MappingProxyType
+from letstracker_perf import timed
+import letstracker_sqltrace as sqltrace
+
+# --- KONFIGURASI DASAR ---
+DB_FILE = os.environ.get("LETSTRACKER_DB", "letstracker.db")
+DEFAULT_GROUP = "utama"
+EXTRA_COLS = ["Catatan"]
+HABIT_FREQUENCIES = ("daily", "weekly", "monthly")
+# Isi awal tabel ibadah saat registri pertama kali dibuat; setelah itu sumbernya database
+_SEED_HABITS = {
+    "Juz 30 (Hafalan/Murajaah)": "daily", "Hadis Arbain 1-25": "daily", "Tilawah 1/2 Juz": "daily",
+    "Al-Matsurat (Pagi/Sore)": "daily", "Qiyamulail": "weekly", "Olahraga": "weekly", "Shaum Sunnah": "monthly"
+}
+_SEED_TARGETS = {"Qiyamulail": 2, "Olahraga": 3, "Shaum Sunnah": 3}
+EXPORT_CHUNK_SIZE = 500
+NOTE_SEARCH_PAGE_SIZE = 10
+AUDIT_SNAPSHOT_EVERY = 200  # snapshot state peserta setiap N catatan audit miliknya
+REGISTRY_CHECK_SECONDS = 5.0  # selang minimum pengecekan versi registri ke database
+TREND_MAX_POINTS = 120
+# Resolusi tren dari yang paling halus; dipilih yang pertama dengan jumlah titik <= TREND_MAX_POINTS
+TREND_FREQS = [("D", "Harian"), ("W-MON", "Pekanan"), ("MS", "Bulanan"), ("QS", "Kuartalan"), ("YS", "Tahunan")]
+ADMINS = [name.strip() for name in os.environ.get("LETSTRACKER_ADMINS", "").split(",") if name.strip()]
+
+def _seed_groups():
+    """Grup (halaqah) -> daftar peserta awal dari berkas JSON LETSTRACKER_GROUPS; nama peserta unik antar grup."""
+    path = os.environ.get("LETSTRACKER_GROUPS")
+    if not path:
+        return {DEFAULT_GROUP: ["Sahrul", "Umam", "Fatih", "Fahmi", "El", "Taqi", "Bang Abror", "Bang Habib", "Bang Yafie", "Bang Yudo"]}
+    with open(path, encoding="utf-8") as f:
+        groups = json.load(f)
+    seen = {}
+    for group, members in groups.items():
+        for name in members:
+            if name in seen: raise ValueError(f"Peserta {name} terdaftar di grup {seen[name]} dan {group}; nama peserta harus unik antar grup.")
+            seen[name] = group
+    return groups
+
+# --- REGISTRI PESERTA & IBADAH ---
+# Tabel peserta dan ibadah (Id integer) adalah sumber daftar peserta, grup, ibadah, dan target.
+# Isinya dibaca sekali ke snapshot Registry immutable; snapshot baru dibuat hanya bila meta
+# 'versi_registri' berubah (dicek paling sering tiap REGISTRY_CHECK_SECONDS, langsung setelah
+# perubahan registri di proses yang sama). Baris progress menyimpan UserId, bukan nama.
+@dataclass(frozen=True)
+class Registry:
+    version: int
+    groups: MappingProxyType        # grup -> tuple nama peserta aktif
+    habits: MappingProxyType        # nama ibadah -> frekuensi, urut Id
+    targets: MappingProxyType       # nama ibadah -> target per pekan/bulan
+    habit_bits: MappingProxyType    # nama ibadah -> posisi bit di bitmask audit (Id - 1)
+    user_ids: MappingProxyType      # nama -> Id (termasuk peserta nonaktif)
+    user_names: MappingProxyType    # Id -> nama
+    user_groups: MappingProxyType   # nama -> grup
+
+    @property
+    def participants(self):
+        return tuple(name for members in self.groups.values() for name in members)
+
+    @property
+    def daily_habits(self):
+        return [habit for habit, freq in self.habits.items() if freq == 'daily']
+
+    @property
+    def data_cols(self):
+        return ["Tanggal", "User"] + list(self.habits) + EXTRA_COLS
+
+    @property
+    def stored_cols(self):
+        # data_cols versi tersimpan: UserId menggantikan nama peserta
+        return ["Tanggal", "UserId"] + list(self.habits) + EXTRA_COLS
+
+    @property
+    def row_cols(self):
+        # Kolom tersimpan per baris progress (main dan arsip)
+        return self.stored_cols + ["Versi", "Grup"]
+
+def _seed_registry():
+    groups = _seed_groups()
+    users = [(name, group, 1) for group, members in groups.items() for name in members]
+    habits = [(habit, freq, _SEED_TARGETS.get(habit)) for habit, freq in _SEED_HABITS.items()]
+    return users, habits
+
+def _build_registry(version, users, habits):
+    """users: (Id, Nama, Grup, Aktif) urut Id; habits: (Id, Nama, Frekuensi, Target) urut Id."""
+    groups = {}
+    for _, name, group, active in users:
+        members = groups.setdefault(group, [])
+        if active: members.append(name)
+    return Registry(
+        version=version,
+        groups=MappingProxyType({group: tuple(members) for group, members in groups.items()}),
+        habits=MappingProxyType({name: freq for _, name, freq, _ in habits}),
+        targets=MappingProxyType({name: target for _, name, _, target in habits if target is not None}),
+        habit_bits=MappingProxyType({name: habit_id - 1 for habit_id, name, _, _ in habits}),
+        user_ids=MappingProxyType({name: user_id for user_id, name, _, _ in users}),
+        user_names=MappingProxyType({user_id: name for user_id, name, _, _ in users}),
+        user_groups=MappingProxyType({name: group for _, name, group, _ in users}),
+    )
+
+def _load_registry(conn):
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'peserta'").fetchone() is None:
+        # Database belum diinisialisasi: pakai isi awal tanpa menulis apa pun
+        users, habits = _seed_registry()
+        return _build_registry(0, [(i, *user) for i, user in enumerate(users, 1)], [(i, *habit) for i, habit in enumerate(habits, 1)])
+    version = conn.execute("SELECT value FROM meta WHERE key = 'versi_registri'").fetchone()
+    return _build_registry(version[0] if version else 0,
+                           conn.execute("SELECT Id, Nama, Grup, Aktif FROM peserta ORDER BY Id").fetchall(),
+                           conn.execute("SELECT Id, Nama, Frekuensi, Target FROM ibadah ORDER BY Id").fetchall())
+
+_registry = None
+_registry_checked = 0.0
+_registry_lock = threading.Lock()
+
+def registry(refresh=False):
+    """Snapshot registri terbaru (jangan diubah; dipakai bersama antar thread)."""
+    global _registry, _registry_checked
+    now = time.monotonic()
+    if _registry is not None and not refresh and now - _registry_checked < REGISTRY_CHECK_SECONDS:
+        return _registry
+    with _registry_lock:
+        conn = connect()
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'versi_registri'").fetchone() if _registry is not None else None
+            if _registry is None or refresh or (row[0] if row else 0) != _registry.version:
+                _registry = _load_registry(conn)
+        except sqlite3.OperationalError:
+            # Tabel meta belum ada (database baru)
+            _registry = _load_registry(conn)
+        finally:
+            conn.close()
+        _registry_checked = now
+        return _registry
+
+def __getattr__(name):
+    # Nama konstanta lama tetap bisa diimpor; nilainya dibaca dari snapshot registri terbaru
+    reg = registry()
+    if name == "PARTICIPANTS": return list(reg.participants)
+    if name == "GROUPS": return {group: list(members) for group, members in reg.groups.items()}
+    if name == "HABITS": return dict(reg.habits)
+    if name == "TARGETS": return dict(reg.targets)
+    if name == "DAILY_HABITS": return reg.daily_habits
+    if name == "DATA_COLS": return reg.data_cols
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def group_of(user):
+    return registry().user_groups.get(user, DEFAULT_GROUP)
+
+def participants(group=None):
+    """Peserta aktif satu grup, atau semua peserta aktif bila group None."""
+    reg = registry()
+    return list(reg.groups.get(group, ())) if group is not None else list(reg.participants)
+
+def _user_id(user):
+    """Id peserta (None bila nama tidak terdaftar)."""
+    return registry().user_ids.get(user)
+
+def _require_user_id(user):
+    # Peserta yang baru didaftarkan proses lain mungkin belum ada di snapshot: cek ulang sekali
+    user_id = _user_id(user)
+    if user_id is None: user_id = registry(refresh=True).user_ids.get(user)
+    if user_id is None: raise ValueError(f"Peserta {user} tidak terdaftar.")
+    return user_id
+
+def _bump_registry_version(c):
+    c.execute("INSERT INTO meta (key, value) VALUES ('versi_registri', 1) ON CONFLICT (key) DO UPDATE SET value = value + 1")
+
+@timed("add_participant")
+def add_participant(name, group=DEFAULT_GROUP):
+    """Mendaftarkan peserta baru (atau mengaktifkan kembali peserta nonaktif di grupnya semula)."""
+    name = name.strip()
+    if not name: raise ValueError("Nama peserta tidak boleh kosong.")
+    conn = connect()
+    c = conn.cursor()
+    row = c.execute("SELECT Grup, Aktif FROM peserta WHERE Nama = ?", (name,)).fetchone()
+    if row and row[1]:
+        conn.close()
+        raise ValueError(f"Peserta {name} sudah terdaftar di grup {row[0]}.")
+    if row:
+        group = row[0]
+        c.execute("UPDATE peserta SET Aktif = 1 WHERE Nama = ?", (name,))
+    else:
+        c.execute("INSERT INTO peserta (Nama, Grup, Aktif) VALUES (?, ?, 1)", (name, group))
+    _bump_registry_version(c)
+    _bump_data_version(c, group)
+    conn.commit()
+    conn.close()
+    registry(refresh=True)
+    return group
+
+@timed("set_participant_active")
+def set_participant_active(name, active):
+    """Menonaktifkan/mengaktifkan peserta; riwayatnya tetap tersimpan dan bisa diaktifkan lagi."""
+    conn = connect()
+    c = conn.cursor()
+    row = c.execute("SELECT Grup FROM peserta WHERE Nama = ?", (name,)).fetchone()
+    if row is None:
+        conn.close()
+        raise ValueError(f"Peserta {name} tidak terdaftar.")
+    c.execute("UPDATE peserta SET Aktif = ? WHERE Nama = ?", (1 if active else 0, name))
+    _bump_registry_version(c)
+    _bump_data_version(c, row[0])
+    conn.commit()
+    conn.close()
+    registry(refresh=True)
+
+@timed("add_habit")
+def add_habit(name, frequency, target=None):
+    """Menambah ibadah baru: kolom baru di progress (database utama dan semua berkas arsip), nilai lama 0."""
+    if frequency not in HABIT_FREQUENCIES: raise ValueError(f"Frekuensi harus salah satu dari {', '.join(HABIT_FREQUENCIES)}.")
+    if frequency != 'daily' and not target: raise ValueError("Ibadah pekanan/bulanan membutuhkan target.")
+    if '"' in name or not name.strip(): raise ValueError("Nama ibadah tidak valid.")
+    reg = registry(refresh=True)
+    if name in reg.habits: raise ValueError(f"Ibadah {name} sudah ada.")
+    # Bitmask audit disimpan sebagai INTEGER 64-bit bertanda
+    if len(reg.habits) >= 63: raise ValueError("Jumlah ibadah sudah mencapai batas.")
+    conn = connect()
+    c = conn.cursor()
+    years = archived_years(conn)
+    try:
+        for year in years:
+            _attach_archive(conn, year)
+        for schema in ["main"] + [f"arsip_{year}" for year in years]:
+            c.execute(f'ALTER TABLE {schema}.progress ADD COLUMN "{name}" INTEGER DEFAULT 0')
+        c.execute("INSERT INTO ibadah (Nama, Frekuensi, Target) VALUES (?, ?, ?)", (name, frequency, target if frequency != 'daily' else None))
+        _bump_registry_version(c)
+        for group in reg.groups: _bump_data_version(c, group)
+        conn.commit()
+    finally:
+        # Menutup koneksi sekaligus melepas arsip yang sempat di-ATTACH
+        conn.rollback()
+        conn.close()
+    registry(refresh=True)
+
+@timed("set_habit_target")
+def set_habit_target(name, target):
+    """Mengubah target ibadah pekanan/bulanan; semua leaderboard dihitung ulang dengan target baru."""
+    reg = registry(refresh=True)
+    if reg.habits.get(name) not in ("weekly", "monthly"): raise ValueError(f"{name} bukan ibadah pekanan/bulanan yang terdaftar.")
+    if target <= 0: raise ValueError("Target harus lebih dari 0.")
+    conn = connect()
+    c = conn.cursor()
+    c.execute("UPDATE ibadah SET Target = ? WHERE Nama = ?", (target, name))
+    _bump_registry_version(c)
+    for group in reg.groups: _bump_data_version(c, group)
+    conn.commit()
+    conn.close()
+    registry(refresh=True)
+
+# --- FUNGSI DATABASE (SQLite) ---
+def connect():
+    """Semua akses database lewat sini agar tracing SQL (LETSTRACKER_SQL_TRACE=1) bisa dipasang."""
+    if sqltrace.ENABLED or sqltrace.TIMING:
+        return sqlite3.connect(DB_FILE, factory=sqltrace.TracedConnection)
+    return sqlite3.connect(DB_FILE)
+
+def _table_cols(c, table, schema="main"):
+    return [row[1] for row in c.execute(f'PRAGMA {schema}.table_info({table})')]
+
+def _init_registry(c):
+    """Membuat dan mengisi tabel peserta/ibadah bila belum ada.
+
+    Nama di baris progress lama yang tidak ada di daftar awal ikut didaftarkan sebagai peserta
+    nonaktif agar riwayatnya tetap terbaca setelah migrasi ke UserId.
+    """
+    if c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'peserta'").fetchone() is not None: return
+    c.execute('CREATE TABLE peserta (Id INTEGER PRIMARY KEY, Nama TEXT NOT NULL UNIQUE, Grup TEXT NOT NULL, Aktif INTEGER NOT NULL DEFAULT 1)')
+    c.execute('CREATE TABLE ibadah (Id INTEGER PRIMARY KEY, Nama TEXT NOT NULL UNIQUE, Frekuensi TEXT NOT NULL, Target INTEGER)')
+    users, habits = _seed_registry()
+    c.executemany("INSERT INTO peserta (Nama, Grup, Aktif) VALUES (?, ?, ?)", users)
+    c.executemany("INSERT INTO ibadah (Nama, Frekuensi, Target) VALUES (?, ?, ?)", habits)
+    if 'User' in _table_cols(c, 'progress'):
+        legacy = [f"SELECT User FROM {table}" for table in ("progress", "progress_deleted", "audit_log")
+                  if 'User' in _table_cols(c, table)]
+        c.execute(f"INSERT INTO peserta (Nama, Grup, Aktif) SELECT DISTINCT User, ?, 0 FROM ({' UNION '.join(legacy)}) "
+                  "WHERE User IS NOT NULL AND User NOT IN (SELECT Nama FROM peserta)", (DEFAULT_GROUP,))
+    _bump_registry_version(c)
+
+def _create_progress_table(c, schema, reg, name="progress"):
+    habit_cols = ", ".join([f'"{habit}" INTEGER DEFAULT 0' for habit in reg.habits])
+    c.execute(f'CREATE TABLE IF NOT EXISTS {schema}.{name} (Tanggal TEXT, UserId INTEGER, {habit_cols}, Catatan TEXT, Versi INTEGER DEFAULT 0, '
+              f"Grup TEXT NOT NULL DEFAULT '{DEFAULT_GROUP}', PRIMARY KEY (Tanggal, UserId))")
+
+def _create_progress_indexes(c, schema):
+    c.execute(f'CREATE INDEX IF NOT EXISTS {schema}.idx_progress_user_tanggal ON progress (UserId, Tanggal)')
+    c.execute(f'CREATE INDEX IF NOT EXISTS {schema}.idx_progress_versi ON progress (Versi, Tanggal, UserId)')
+    # Scan per grup (leaderboard, heatmap) hanya menyentuh baris grup itu
+    c.execute(f'CREATE INDEX IF NOT EXISTS {schema}.idx_progress_grup_tanggal ON progress (Grup, Tanggal, UserId)')
+
+def _migrate_progress_user_ids(c, schema, reg):
+    """Migrasi: progress ber-kolom User (nama) -> UserId (Id peserta), dibangun ulang di tabel baru.
+
+    Kolom Versi/Grup yang belum ada di skema lama diisi 1 dan grup peserta. Nama yang belum
+    terdaftar (mis. hanya muncul di berkas arsip) didaftarkan sebagai peserta nonaktif; bila jumlah
+    baris hasil salinan tetap berbeda, migrasi dibatalkan sebelum tabel lama dibuang.
+    """
+    cols = _table_cols(c, "progress", schema)
+    added = c.execute(f"INSERT INTO main.peserta (Nama, Grup, Aktif) SELECT DISTINCT User, ?, 0 FROM {schema}.progress "
+                      "WHERE User IS NOT NULL AND User NOT IN (SELECT Nama FROM main.peserta)", (DEFAULT_GROUP,)).rowcount
+    if added > 0: _bump_registry_version(c)
+    _create_progress_table(c, schema, reg, "progress_baru")
+    habits = [habit for habit in reg.habits if habit in cols]
+    versi = "p.Versi" if "Versi" in cols else "1"
+    old_habits = ", ".join(f'p."{habit}"' for habit in habits)
+    copied = c.execute(f"INSERT INTO {schema}.progress_baru (Tanggal, UserId, {_quote_cols(habits)}, Catatan, Versi, Grup) "
+                       f"SELECT p.Tanggal, ps.Id, {old_habits}, p.Catatan, {versi}, ps.Grup "
+                       f"FROM {schema}.progress p JOIN main.peserta ps ON ps.Nama = p.User").rowcount
+    total = c.execute(f"SELECT COUNT(*) FROM {schema}.progress").fetchone()[0]
+    if copied != total:
+        c.connection.rollback()
+        raise RuntimeError(f"Migrasi UserId {schema}.progress dibatalkan: {total - copied} dari {total} baris tidak bisa dipetakan ke peserta.")
+    c.execute(f"DROP TABLE {schema}.progress")
+    c.execute(f"ALTER TABLE {schema}.progress_baru RENAME TO progress")
+
+def init_db():
+    conn = connect()
+    c = conn.cursor()
+    # Satu transaksi tulis: proses lain yang memanggil init_db bersamaan menunggu migrasi selesai
+    c.execute('BEGIN IMMEDIATE')
+    c.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)')
+    _init_registry(c)
+    reg = _load_registry(c)
+    if 'User' in _table_cols(c, 'progress'):
+        _migrate_progress_user_ids(c, "main", reg)
+    _create_progress_table(c, "main", reg)
+    _create_progress_indexes(c, "main")
+    if 'User' in _table_cols(c, 'progress_deleted'):
+        c.execute('ALTER TABLE progress_deleted RENAME TO progress_deleted_lama')
+    c.execute('CREATE TABLE IF NOT EXISTS progress_deleted (Tanggal TEXT, UserId INTEGER, Versi INTEGER, PRIMARY KEY (Tanggal, UserId))')
+    if c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'progress_deleted_lama'").fetchone():
+        c.execute("INSERT INTO progress_deleted (Tanggal, UserId, Versi) SELECT d.Tanggal, ps.Id, d.Versi FROM progress_deleted_lama d JOIN peserta ps ON ps.Nama = d.User")
+        c.execute("DROP TABLE progress_deleted_lama")
+    c.execute('CREATE INDEX IF NOT EXISTS idx_progress_deleted_versi ON progress_deleted (Versi, Tanggal, UserId)')
+    c.execute("INSERT OR IGNORE INTO meta (key, value) SELECT 'versi_data', COALESCE(MAX(Versi), 0) FROM progress")
+    c.execute('CREATE TABLE IF NOT EXISTS arsip_tahun (Tahun INTEGER PRIMARY KEY, Berkas TEXT, Baris INTEGER, Diarsipkan TEXT)')
+    if c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'audit_log'").fetchone() is None:
+        # Jurnal audit append-only: Lama/Baru = bitmask ibadah (bit = Id ibadah - 1), NULL = baris tidak ada.
+        # User menyimpan nama peserta apa adanya saat perubahan terjadi
+        c.execute('CREATE TABLE audit_log (Id INTEGER PRIMARY KEY, Waktu TEXT, User TEXT, Tanggal TEXT, Operasi TEXT, '
+                  'Lama INTEGER, Baru INTEGER, HashCatatan TEXT, Sesi TEXT)')
+        c.execute('CREATE INDEX idx_audit_user ON audit_log (User, Id)')
+        c.execute('CREATE TABLE audit_snapshot (User TEXT, AuditId INTEGER, Waktu TEXT, Data BLOB, PRIMARY KEY (User, AuditId))')
+        c.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('audit_mulai', ?)", (int(time.time()),))
+        # Snapshot awal (AuditId 0) untuk data yang sudah ada sebelum audit dimulai
+        for (user_id,) in c.execute("SELECT DISTINCT UserId FROM progress").fetchall():
+            _audit_snapshot(c, reg, reg.user_names[user_id], 0)
+    if 'User' in _table_cols(c, 'streaks'):
+        c.execute('DROP TABLE streaks')
+    streaks_missing = c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'streaks'").fetchone() is None
+    c.execute('CREATE TABLE IF NOT EXISTS streaks (UserId INTEGER, Ibadah TEXT, Streak INTEGER, Terpanjang INTEGER, Terakhir TEXT, PRIMARY KEY (UserId, Ibadah))')
+    if 'User' in _table_cols(c, 'catatan_fts'):
+        # Rowid progress berubah saat migrasi UserId: indeks lama dibuang dan dibangun ulang
+        c.execute('DROP TABLE catatan_fts')
+    if c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'catatan_fts'").fetchone() is None:
+        # Indeks FTS5 external-content atas progress.Catatan; disinkronkan eksplisit oleh upsert_data/delete_data
+        c.execute("CREATE VIRTUAL TABLE catatan_fts USING fts5(Catatan, content='progress', content_rowid='rowid', "
+                  "tokenize='unicode61 remove_diacritics 2', prefix='2 3')")
+        c.execute("INSERT INTO catatan_fts (catatan_fts) VALUES ('rebuild')")
+    conn.commit()
+    for year in archived_years(conn):
+        if not os.path.exists(archive_path(year)): continue
+        c.execute(f"ATTACH DATABASE ? AS arsip_{year}", (archive_path(year),))
+        c.execute('BEGIN IMMEDIATE')
+        if 'User' in _table_cols(c, 'progress', f"arsip_{year}"):
+            _migrate_progress_user_ids(c, f"arsip_{year}", reg)
+            _create_progress_indexes(c, f"arsip_{year}")
+        conn.commit()
+        c.execute(f"DETACH DATABASE arsip_{year}")
+    conn.close()
+    registry(refresh=True)
+    if streaks_missing: rebuild_streaks()
+
+_write_listeners = []
+
+def add_write_listener(fn):
+    """fn(user, tanggal_str) dipanggil setelah upsert_data/delete_data berhasil commit."""
+    _write_listeners.append(fn)
+
+def _notify_write(user, date_str):
+    for fn in _write_listeners:
+        fn(user, date_str)
+
+def _quote_cols(cols):
+    return ", ".join([f'"{col}"' for col in cols])
+
+def _habit_mask(values, reg):
+    return sum(1 << reg.habit_bits[habit] for habit in reg.habits if values.get(habit) in (1, True))
+
+def _note_hash(note):
+    return hashlib.blake2b(note.encode('utf-8'), digest_size=8).hexdigest() if note else None
+
+def _audit_now():
+    return datetime.now().isoformat(timespec='milliseconds')
+
+def _audit_snapshot(c, reg, user, audit_id):
+    habits = list(reg.habits)
+    rows = c.execute(f"SELECT {_quote_cols(['Tanggal'] + habits + ['Catatan'])} FROM progress WHERE UserId = ?", (reg.user_ids[user],)).fetchall()
+    state = {row[0]: [_habit_mask(dict(zip(habits, row[1:-1])), reg), _note_hash(row[-1])] for row in rows}
+    c.execute("INSERT OR REPLACE INTO audit_snapshot (User, AuditId, Waktu, Data) VALUES (?, ?, ?, ?)",
+              (user, audit_id, _audit_now(), zlib.compress(json.dumps(state).encode('utf-8'))))
+
+def _audit(c, reg, user, date_str, operation, old_values, new_values, session):
+    """Menambah satu catatan perubahan di transaksi penulisan yang sama (+ snapshot berkala)."""
+    c.execute("INSERT INTO audit_log (Waktu, User, Tanggal, Operasi, Lama, Baru, HashCatatan, Sesi) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+              (_audit_now(), user, date_str, operation, _habit_mask(old_values, reg) if old_values is not None else None,
+               _habit_mask(new_values, reg) if new_values is not None else None, _note_hash((new_values or {}).get('Catatan')), session))
+    audit_id = c.lastrowid
+    since_snapshot = c.execute("SELECT COUNT(*) FROM audit_log WHERE User = ? AND Id > (SELECT COALESCE(MAX(AuditId), 0) FROM audit_snapshot WHERE User = ?)",
+                               (user, user)).fetchone()[0]
+    if since_snapshot >= AUDIT_SNAPSHOT_EVERY: _audit_snapshot(c, reg, user, audit_id)
+
+def _check_not_archived(c, date_str):
+    if c.execute("SELECT 1 FROM arsip_tahun WHERE Tahun = ?", (int(date_str[:4]),)).fetchone():
+        raise ValueError(f"Tahun {date_str[:4]} sudah diarsipkan; kembalikan dulu dengan unarchive_year({date_str[:4]}) untuk mengubah datanya.")
+
+def _old_values(c, reg, date_str, user_id):
+    cols = list(reg.habits) + EXTRA_COLS
+    row = c.execute(f"SELECT {_quote_cols(cols)} FROM progress WHERE Tanggal = ? AND UserId = ?", (date_str, user_id)).fetchone()
+    return dict(zip(cols, row)) if row else None
+
+def _unindex_note(c, date_str, user_id):
+    # FTS5 external-content: baris lama harus dihapus dari indeks dengan nilai yang dulu diindeks
+    old = c.execute("SELECT rowid, Catatan FROM progress WHERE Tanggal = ? AND UserId = ?", (date_str, user_id)).fetchone()
+    if old: c.execute("INSERT INTO catatan_fts (catatan_fts, rowid, Catatan) VALUES ('delete', ?, ?)", old)
+
+def _bump_data_version(c, group, date_str=None):
+    """Menaikkan penghitung perubahan global dan milik grup di dalam transaksi penulisan yang sama.
+
+    Versi global menjadi nilai kolom Versi (ekspor inkremental); versi grup menjadi token cache
+    grup itu, sehingga penulisan di satu grup tidak membatalkan cache grup lain. Penulisan ke
+    tanggal sebelum pekan berjalan juga menaikkan versi riwayat (token cache pekan yang sudah selesai).
+    """
+    c.execute("UPDATE meta SET value = value + 1 WHERE key = 'versi_data'")
+    c.execute("INSERT INTO meta (key, value) VALUES (?, 1) ON CONFLICT (key) DO UPDATE SET value = value + 1", (f"versi_data:{group}",))
+    if date_str is not None and date_str < period_bounds(datetime.now().date())[0].isoformat():
+        c.executemany("INSERT INTO meta (key, value) VALUES (?, 1) ON CONFLICT (key) DO UPDATE SET value = value + 1",
+                      [("versi_riwayat",), (f"versi_riwayat:{group}",)])
+    return c.execute("SELECT value FROM meta WHERE key = 'versi_data'").fetchone()[0]
+
+def _meta_value(key):
+    conn = connect()
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    conn.close()
+    return row[0] if row else 0
+
+def current_data_version(group=None):
+    """Versi data global, atau versi milik satu grup."""
+    return _meta_value("versi_data" if group is None else f"versi_data:{group}")
+
+def history_version(group=None):
+    """Versi riwayat global/grup: hanya naik bila data sebelum pekan berjalan berubah."""
+    return _meta_value("versi_riwayat" if group is None else f"versi_riwayat:{group}")
+
+def _with_user_names(df, reg):
+    """Kolom UserId hasil query -> kolom User (nama) di posisi yang sama."""
+    if 'UserId' in df.columns:
+        df.insert(df.columns.get_loc('UserId'), 'User', df['UserId'].map(reg.user_names))
+        df.drop(columns='UserId', inplace=True)
+    return df
+
+def _normalize_user_frame(df, reg):
+    if not df.empty and 'Tanggal' in df.columns:
+        df['Tanggal'] = pd.to_datetime(df['Tanggal'], errors='coerce')
+        df.dropna(subset=['Tanggal'], inplace=True)
+        for col in list(reg.habits) + EXTRA_COLS:
+            if col not in df.columns: df[col] = 0 if col != 'Catatan' else ''
+        df['Catatan'] = df['Catatan'].fillna('')
+    return df
+
+# --- ARSIP PER TAHUN (ATTACH) ---
+# Tahun yang sudah selesai bisa dipindah ke berkas arsip sendiri (letstracker_<tahun>.db) agar
+# database utama tetap kecil. Pembaca memanggil _progress_source() dengan rentang tanggalnya:
+# arsip hanya di-ATTACH bila rentang menyentuh tahunnya, lalu dibaca lewat view TEMP
+# progress_semua (UNION ALL); filter WHERE diteruskan SQLite ke indeks tiap berkas.
+# SQLite membatasi jumlah ATTACH (default 10) per koneksi.
+
+def archive_path(year, db_file=None):
+    stem, ext = os.path.splitext(db_file or DB_FILE)
+    return f"{stem}_{year}{ext or '.db'}"
+
+def archived_years(conn=None):
+    own = conn is None
+    conn = conn or connect()
+    years = [year for (year,) in conn.execute("SELECT Tahun FROM main.arsip_tahun ORDER BY Tahun")]
+    if own: conn.close()
+    return years
+
+def _attach_archive(conn, year):
+    # ATTACH pada berkas yang tidak ada diam-diam membuat database kosong
+    if not os.path.exists(archive_path(year)): raise FileNotFoundError(f"Berkas arsip tahun {year} tidak ditemukan: {archive_path(year)}")
+    conn.execute(f"ATTACH DATABASE ? AS arsip_{year}", (archive_path(year),))
+
+def _progress_source(conn, start=None, end=None):
+    """Nama tabel/view untuk membaca progress pada rentang [start, end] (None = tanpa batas)."""
+    years = [year for year in archived_years(conn) if (start is None or year >= start.year) and (end is None or year <= end.year)]
+    if not years: return "progress"
+    cols = _quote_cols(registry().row_cols)
+    for year in years:
+        _attach_archive(conn, year)
+    union = " UNION ALL ".join([f"SELECT {cols} FROM main.progress"] + [f"SELECT {cols} FROM arsip_{year}.progress" for year in years])
+    conn.execute(f"CREATE TEMP VIEW progress_semua AS {union}")
+    return "progress_semua"
+
+def _range_filter(start=None, end=None, group=None):
+    clauses, params = ([], []) if group is None else (["Grup = ?"], [group])
+    if start is not None: clauses, params = clauses + ["Tanggal >= ?"], params + [start.strftime('%Y-%m-%d')]
+    if end is not None: clauses, params = clauses + ["Tanggal <= ?"], params + [end.strftime('%Y-%m-%d')]
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), tuple(params)
+
+@timed("archive_year")
+def archive_year(year, vacuum=False):
+    """Memindahkan semua baris tahun `year` (yang sudah lewat) ke berkas arsipnya; mengembalikan jumlah baris.
+
+    Data tahun arsip tidak bisa diubah sampai dikembalikan (unarchive_year). Pencarian catatan
+    (FTS) dan pembaruan streak inkremental hanya membaca database utama; rebuild_streaks()
+    membaca semua tahun.
+    """
+    if year >= datetime.now().year: raise ValueError(f"Tahun {year} belum selesai dan tidak bisa diarsipkan.")
+    first, last = f"{year}-01-01", f"{year}-12-31"
+    reg = registry()
+    cols = _quote_cols(reg.row_cols)
+    conn = connect()
+    c = conn.cursor()
+    c.execute("ATTACH DATABASE ? AS arsip", (archive_path(year),))
+    try:
+        _create_progress_table(c, "arsip", reg)
+        _create_progress_indexes(c, "arsip")
+        c.execute(f"INSERT OR REPLACE INTO arsip.progress ({cols}) SELECT {cols} FROM main.progress WHERE Tanggal BETWEEN ? AND ?", (first, last))
+        moved = c.rowcount
+        c.execute("INSERT INTO catatan_fts (catatan_fts, rowid, Catatan) SELECT 'delete', rowid, Catatan FROM main.progress WHERE Tanggal BETWEEN ? AND ?", (first, last))
+        c.execute("DELETE FROM main.progress WHERE Tanggal BETWEEN ? AND ?", (first, last))
+        total = c.execute("SELECT COUNT(*) FROM arsip.progress").fetchone()[0]
+        c.execute("INSERT OR REPLACE INTO main.arsip_tahun (Tahun, Berkas, Baris, Diarsipkan) VALUES (?, ?, ?, ?)",
+                  (year, os.path.basename(archive_path(year)), total, datetime.now().isoformat(timespec='seconds')))
+        conn.commit()
+    finally:
+        conn.rollback()
+        c.execute("DETACH DATABASE arsip")
+    if vacuum: conn.execute("VACUUM")
+    conn.close()
+    return moved
+
+@timed("unarchive_year")
+def unarchive_year(year):
+    """Mengembalikan baris tahun `year` dari berkas arsip ke database utama lalu menghapus berkasnya."""
+    cols = _quote_cols(registry().row_cols)
+    conn = connect()
+    c = conn.cursor()
+    if year not in archived_years(conn):
+        conn.close()
+        raise ValueError(f"Tahun {year} tidak ada di arsip.")
+    c.execute("ATTACH DATABASE ? AS arsip", (archive_path(year),))
+    try:
+        c.execute(f"INSERT OR REPLACE INTO main.progress ({cols}) SELECT {cols} FROM arsip.progress")
+        restored = c.rowcount
+        c.execute("INSERT INTO catatan_fts (rowid, Catatan) SELECT rowid, Catatan FROM main.progress WHERE Tanggal BETWEEN ? AND ?",
+                  (f"{year}-01-01", f"{year}-12-31"))
+        c.execute("DELETE FROM main.arsip_tahun WHERE Tahun = ?", (year,))
+        conn.commit()
+    finally:
+        conn.rollback()
+        c.execute("DETACH DATABASE arsip")
+    conn.close()
+    os.remove(archive_path(year))
+    return restored
+
+@timed("load_data")
+def load_data(username):
+    reg = registry()
+    conn = connect()
+    source = _progress_source(conn)
+    df = pd.read_sql_query(f"SELECT {_quote_cols(reg.stored_cols)} FROM {source} WHERE UserId = ? ORDER BY Tanggal", conn, params=(_user_id(username),))
+    conn.close()
+    return _normalize_user_frame(_with_user_names(df, reg), reg)
+
+@timed("load_all_user_data")
+def load_all_user_data(start=None, end=None, group=None):
+    """Semua baris semua peserta (atau satu grup), opsional dibatasi rentang tanggal (arsip hanya dibaca bila perlu)."""
+    reg = registry()
+    conn = connect()
+    where, params = _range_filter(start, end, group)
+    df = pd.read_sql_query(f"SELECT {_quote_cols(reg.stored_cols)} FROM {_progress_source(conn, start, end)}{where}", conn, params=params)
+    conn.close()
+    df = _with_user_names(df, reg)
+    if not df.empty and 'Tanggal' in df.columns:
+        df['Tanggal'] = pd.to_datetime(df['Tanggal'], errors='coerce')
+        df.dropna(subset=['Tanggal'], inplace=True)
+    return df
+
+def split_by_user(all_df):
+    """Memecah hasil load_all_user_data menjadi frame per peserta yang sama dengan load_data(peserta)."""
+    reg = registry()
+    frames = {}
+    for user, group in all_df.groupby('User', sort=False):
+        raw = group.sort_values('Tanggal', kind='stable').reset_index(drop=True)
+        raw['Tanggal'] = raw['Tanggal'].dt.strftime('%Y-%m-%d')
+        frames[user] = _normalize_user_frame(raw, reg)
+    return frames
+
+@timed("upsert_data")
+def upsert_data(date, user, data_dict, session=None):
+    user_id = _require_user_id(user)
+    reg = registry()
+    group = reg.user_groups[user]
+    conn = connect()
+    c = conn.cursor()
+    date_str = date.strftime('%Y-%m-%d')
+    _check_not_archived(c, date_str)
+    # ATTACH arsip harus sebelum transaksi tulis dimulai
+    source = _progress_source(conn)
+    old_row = _old_values(c, reg, date_str, user_id)
+    version = _bump_data_version(c, group, date_str)
+    cols = reg.row_cols
+    values = [date_str, user_id] + [data_dict.get(h, 0) for h in reg.habits] + [data_dict.get('Catatan', ''), version, group]
+    placeholders = ", ".join(["?"] * len(cols))
+    _unindex_note(c, date_str, user_id)
+    c.execute(f"INSERT OR REPLACE INTO progress ({_quote_cols(cols)}) VALUES ({placeholders})", values)
+    c.execute("INSERT INTO catatan_fts (rowid, Catatan) VALUES (?, ?)", (c.lastrowid, data_dict.get('Catatan', '')))
+    c.execute("DELETE FROM progress_deleted WHERE Tanggal = ? AND UserId = ?", (date_str, user_id))
+    for habit in reg.daily_habits:
+        old, new = bool(old_row and old_row[habit] == 1), bool(data_dict.get(habit, 0))
+        if old != new: _update_streak(conn, source, user_id, habit, date.date() if isinstance(date, datetime) else date, new)
+    _audit(c, reg, user, date_str, "upsert", old_row, data_dict, session)
+    conn.commit()
+    conn.close()
+    _notify_write(user, date_str)
+
+@timed("delete_data")
+def delete_data(date, user, session=None):
+    user_id = _require_user_id(user)
+    reg = registry()
+    conn = connect()
+    c = conn.cursor()
+    date_str = date.strftime('%Y-%m-%d')
+    _check_not_archived(c, date_str)
+    source = _progress_source(conn)
+    old_row = _old_values(c, reg, date_str, user_id)
+    _unindex_note(c, date_str, user_id)
+    c.execute("DELETE FROM progress WHERE Tanggal = ? AND UserId = ?", (date_str, user_id))
+    if c.rowcount:
+        for habit in reg.daily_habits:
+            if old_row[habit] == 1: _update_streak(conn, source, user_id, habit, date.date() if isinstance(date, datetime) else date, False)
+        version = _bump_data_version(c, reg.user_groups[user], date_str)
+        c.execute("INSERT OR REPLACE INTO progress_deleted (Tanggal, UserId, Versi) VALUES (?, ?, ?)", (date_str, user_id, version))
+        _audit(c, reg, user, date_str, "delete", old_row, None, session)
+    conn.commit()
+    conn.close()
+    _notify_write(user, date_str)
+
+# --- JURNAL AUDIT ---
+def _decode_mask(mask, reg):
+    return {habit: int(bool(mask >> bit & 1)) for habit, bit in reg.habit_bits.items()}
+
+@timed("audit_history")
+def audit_history(user, limit=100):
+    """Perubahan terbaru milik peserta: Waktu, Tanggal, Operasi, Sebelum/Sesudah (nama ibadah), Sesi."""
+    reg = registry()
+    conn = connect()
+    rows = conn.execute("SELECT Waktu, Tanggal, Operasi, Lama, Baru, HashCatatan, Sesi FROM audit_log WHERE User = ? ORDER BY Id DESC LIMIT ?",
+                        (user, limit)).fetchall()
+    conn.close()
+    def names(mask): return None if mask is None else ", ".join(h for h, v in _decode_mask(mask, reg).items() if v)
+    return pd.DataFrame([(waktu, tanggal, op, names(old), names(new), note, sesi) for waktu, tanggal, op, old, new, note, sesi in rows],
+                        columns=["Waktu", "Tanggal", "Operasi", "Sebelum", "Sesudah", "HashCatatan", "Sesi"])
+
+@timed("reconstruct_state")
+def reconstruct_state(user, at):
+    """Isi jurnal peserta pada waktu `at` (datetime): snapshot terdekat sebelum `at` + replay audit setelahnya.
+
+    Hasil: DataFrame Tanggal + kolom ibadah + HashCatatan (isi catatan tidak disimpan di audit).
+    Snapshot dibuat dari database utama, jadi tahun yang sudah diarsipkan tidak ikut direkonstruksi.
+    """
+    at_str = at.isoformat(timespec='milliseconds')
+    reg = registry()
+    conn = connect()
+    started = conn.execute("SELECT value FROM meta WHERE key = 'audit_mulai'").fetchone()
+    if started is None or at.timestamp() < started[0]:
+        conn.close()
+        raise ValueError("Waktu yang diminta lebih awal dari mulainya jurnal audit.")
+    snapshot = conn.execute("SELECT AuditId, Data FROM audit_snapshot WHERE User = ? AND Waktu <= ? ORDER BY AuditId DESC LIMIT 1", (user, at_str)).fetchone()
+    state, after = (json.loads(zlib.decompress(snapshot[1])), snapshot[0]) if snapshot else ({}, 0)
+    for tanggal, new, note in conn.execute("SELECT Tanggal, Baru, HashCatatan FROM audit_log WHERE User = ? AND Id > ? AND Waktu <= ? ORDER BY Id",
+                                           (user, after, at_str)):
+        if new is None: state.pop(tanggal, None)
+        else: state[tanggal] = [new, note]
+    conn.close()
+    return pd.DataFrame([{"Tanggal": tanggal, **_decode_mask(mask, reg), "HashCatatan": note} for tanggal, (mask, note) in sorted(state.items())],
+                        columns=["Tanggal"] + list(reg.habits) + ["HashCatatan"])
+
+# --- STREAK INKREMENTAL (tabel streaks) ---
+# Per (UserId, Ibadah harian): Terakhir = tanggal terakhir ibadah dikerjakan, Streak = panjang
+# rangkaian hari berturut-turut yang berakhir di Terakhir, Terpanjang = rangkaian terpanjang.
+def _run_length(conn, source, user_id, habit, start, step):
+    """Jumlah hari berturut-turut (ibadah = 1) mulai dari `start`, mundur (step=-1) atau maju (+1).
+
+    Kursor berhenti di celah pertama, jadi yang dibaca hanya sepanjang rangkaian itu.
+    """
+    op, order = ("<=", "DESC") if step < 0 else (">=", "ASC")
+    cursor = conn.execute(f'SELECT Tanggal FROM {source} WHERE UserId = ? AND Tanggal {op} ? AND "{habit}" = 1 ORDER BY Tanggal {order}', (user_id, start.isoformat()))
+    length, expected = 0, start
+    for (tanggal,) in cursor:
+        if tanggal != expected.isoformat(): break
+        length, expected = length + 1, expected + timedelta(days=step)
+    cursor.close()
+    return length
+
+def _longest_run(conn, source, user_id, habit):
+    longest, run, previous = 0, 0, None
+    for (tanggal,) in conn.execute(f'SELECT Tanggal FROM {source} WHERE UserId = ? AND "{habit}" = 1 ORDER BY Tanggal', (user_id,)):
+        day = date_cls.fromisoformat(tanggal)
+        run = run + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+        longest, previous = max(longest, run), day
+    return longest
+
+def _update_streak(conn, source, user_id, habit, day, done):
+    """Memperbarui state streak setelah status `habit` pada `day` berubah menjadi `done` (dalam transaksi yang sama).
+
+    Penambahan di ujung rangkaian cukup O(1); perubahan di tengah riwayat hanya membaca rangkaian
+    di sekitar `day`. Terpanjang dihitung ulang dari riwayat peserta hanya bila rangkaian yang
+    terputus mungkin adalah rangkaian terpanjang. `source` = hasil _progress_source (termasuk arsip),
+    sama dengan sumber rebuild_streaks, agar riwayat yang sudah diarsipkan tidak hilang dari Terpanjang.
+    """
+    state = conn.execute("SELECT Streak, Terpanjang, Terakhir FROM streaks WHERE UserId = ? AND Ibadah = ?", (user_id, habit)).fetchone()
+    streak, longest, last = (state[0], state[1], date_cls.fromisoformat(state[2]) if state[2] else None) if state else (0, 0, None)
+    one_day = timedelta(days=1)
+    if done:
+        if last is None or day > last:
+            streak = streak + 1 if last == day - one_day else 1
+            last = day
+            longest = max(longest, streak)
+        else:
+            back, fwd = _run_length(conn, source, user_id, habit, day - one_day, -1), _run_length(conn, source, user_id, habit, day + one_day, 1)
+            if day + fwd * one_day == last: streak = back + 1 + fwd
+            longest = max(longest, back + 1 + fwd)
+    else:
+        back, fwd = _run_length(conn, source, user_id, habit, day - one_day, -1), _run_length(conn, source, user_id, habit, day + one_day, 1)
+        if day == last:
+            if back:
+                last, streak = day - one_day, back
+            else:
+                previous = conn.execute(f'SELECT MAX(Tanggal) FROM {source} WHERE UserId = ? AND Tanggal < ? AND "{habit}" = 1', (user_id, day.isoformat())).fetchone()[0]
+                last = date_cls.fromisoformat(previous) if previous else None
+                streak = _run_length(conn, source, user_id, habit, last, -1) if last else 0
+        elif last is not None and day + fwd * one_day == last:
+            streak = fwd
+        if back + 1 + fwd >= longest:
+            longest = _longest_run(conn, source, user_id, habit)
+    conn.execute("INSERT OR REPLACE INTO streaks (UserId, Ibadah, Streak, Terpanjang, Terakhir) VALUES (?, ?, ?, ?, ?)",
+                 (user_id, habit, streak, longest, last.isoformat() if last else None))
+
+def rebuild_streaks():
+    """Menghitung ulang seluruh tabel streaks dari riwayat (backfill/perbaikan), vektor per ibadah."""
+    daily_habits = registry().daily_habits
+    conn = connect()
+    df = pd.read_sql_query(f"SELECT UserId, Tanggal, {_quote_cols(daily_habits)} FROM {_progress_source(conn)}", conn)
+    df['Tanggal'] = pd.to_datetime(df['Tanggal'], errors='coerce')
+    df.dropna(subset=['Tanggal'], inplace=True)
+    rows = []
+    for habit in daily_habits:
+        done = df.loc[df[habit] == 1, ['UserId', 'Tanggal']].sort_values(['UserId', 'Tanggal'])
+        if done.empty: continue
+        new_run = (done['Tanggal'].diff() != pd.Timedelta(days=1)) | (done['UserId'] != done['UserId'].shift())
+        run_len = done.groupby(new_run.cumsum())['Tanggal'].transform('size')
+        per_user = done.assign(run_len=run_len).groupby('UserId').agg(Terakhir=('Tanggal', 'max'), Streak=('run_len', 'last'), Terpanjang=('run_len', 'max'))
+        rows += [(int(user_id), habit, int(r.Streak), int(r.Terpanjang), r.Terakhir.strftime('%Y-%m-%d')) for user_id, r in per_user.iterrows()]
+    conn.execute("DELETE FROM streaks")
+    conn.executemany("INSERT INTO streaks (UserId, Ibadah, Streak, Terpanjang, Terakhir) VALUES (?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+def _current_streak(streak, terakhir, last_entry, today):
+    # Streak berjalan dihitung dari entri terakhir peserta, yang harus hari ini/kemarin
+    if not last_entry or date_cls.fromisoformat(last_entry) < today - timedelta(days=1): return 0
+    return streak if terakhir == last_entry else 0
+
+@timed("load_streaks")
+def load_streaks(username, today=None):
+    """{ibadah harian: (streak saat ini, streak terpanjang)} dari tabel streaks, tanpa memuat riwayat."""
+    today = today or datetime.now().date()
+    user_id = _user_id(username)
+    conn = connect()
+    last_entry = conn.execute("SELECT MAX(Tanggal) FROM progress WHERE UserId = ?", (user_id,)).fetchone()[0]
+    rows = conn.execute("SELECT Ibadah, Streak, Terpanjang, Terakhir FROM streaks WHERE UserId = ?", (user_id,)).fetchall()
+    conn.close()
+    if last_entry is None: return {}
+    state = {habit: (_current_streak(streak, terakhir, last_entry, today), longest) for habit, streak, longest, terakhir in rows}
+    return {habit: state.get(habit, (0, 0)) for habit in registry().daily_habits}
+
+def load_all_streaks(today=None, group=None):
+    """Streak saat ini semua peserta (atau satu grup; DataFrame User x ibadah harian) dari tabel streaks."""
+    today = today or datetime.now().date()
+    reg = registry()
+    user_ids = [reg.user_ids[user] for user in participants(group)]
+    conn = connect()
+    # MAX(Tanggal) per peserta lewat indeks (UserId, Tanggal): tidak memindai baris grup lain
+    rows = conn.execute("SELECT UserId, Ibadah, Streak, Terakhir, (SELECT MAX(Tanggal) FROM progress p WHERE p.UserId = s.UserId) FROM streaks s "
+                        f"WHERE UserId IN ({', '.join('?' * len(user_ids))})", user_ids).fetchall()
+    conn.close()
+    rows = [row for row in rows if row[-1] is not None]
+    values = pd.DataFrame([(reg.user_names[user_id], habit, _current_streak(streak, terakhir, last_entry, today))
+                           for user_id, habit, streak, terakhir, last_entry in rows], columns=['User', 'Ibadah', 'Streak'])
+    return values.pivot(index='User', columns='Ibadah', values='Streak').reindex(columns=reg.daily_habits).fillna(0).astype(int)
+
+# --- PENCARIAN CATATAN (FTS5) ---
+def note_search_query(text):
+    """Mengubah input pengguna menjadi query FTS5 yang aman.
+
+    "frasa persis" tetap frasa, kata diakhiri * menjadi pencarian awalan, kata lain digabung
+    dengan AND. Semua token dikutip sehingga operator/tanda baca tidak memicu syntax error.
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', text):
+        if phrase.strip():
+            terms.append('"' + phrase.strip() + '"')
+        elif word:
+            prefix = word.endswith('*')
+            word = word.rstrip('*').replace('"', '')
+            if word: terms.append(f'"{word}"' + ('*' if prefix else ''))
+    return " ".join(terms)
+
+@timed("search_notes")
+def search_notes(username, text, page=0, page_size=NOTE_SEARCH_PAGE_SIZE):
+    """Catatan peserta yang cocok, urut relevansi (bm25): (DataFrame Tanggal/Cuplikan, total hasil).
+
+    Cuplikan menandai kata yang cocok dengan **tebal** (markdown).
+    """
+    query = note_search_query(text)
+    if not query: return pd.DataFrame(columns=["Tanggal", "Cuplikan"]), 0
+    conn = connect()
+    user_id = _user_id(username)
+    match = "FROM catatan_fts JOIN progress p ON p.rowid = catatan_fts.rowid WHERE catatan_fts MATCH ? AND p.UserId = ?"
+    total = conn.execute(f"SELECT COUNT(*) {match}", (query, user_id)).fetchone()[0]
+    rows = conn.execute(f"SELECT p.Tanggal, snippet(catatan_fts, 0, '**', '**', '…', 16) {match} ORDER BY catatan_fts.rank LIMIT ? OFFSET ?",
+                        (query, user_id, page_size, page * page_size)).fetchall()
+    conn.close()
+    return pd.DataFrame(rows, columns=["Tanggal", "Cuplikan"]), total
+
+# --- EKSPOR RINGAN (CSV/NDJSON) ---
+def iter_progress_export(fmt="csv", since=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Generator teks CSV/NDJSON langsung dari SQLite, tanpa DataFrame.
+
+    Tanpa `since` semua baris diekspor; dengan `since` hanya baris yang berubah atau
+    terhapus (Operasi = 'delete') setelah versi tersebut. Tiap potongan adalah query
+    terpisah (keyset) sehingga penulis tidak tertahan selama ekspor berjalan.
+    """
+    reg = registry()
+    cols = reg.data_cols + ["Versi", "Operasi"]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if fmt == "csv":
+        writer.writerow(cols)
+        yield buffer.getvalue()
+    conn = connect()
+    keyset = "(Versi, Tanggal, UserId) > (?, ?, ?) ORDER BY Versi, Tanggal, UserId LIMIT ?"
+    live = f"SELECT {_quote_cols(reg.stored_cols)}, Versi, 'upsert' AS Operasi FROM {_progress_source(conn)}"
+    if since is None:
+        query, params, key = f"{live} WHERE {keyset}", (), (-1, '', -1)
+    else:
+        gone = ", ".join(["NULL"] * (len(reg.habits) + len(EXTRA_COLS)))
+        deleted = f"SELECT Tanggal, UserId, {gone}, Versi, 'delete' AS Operasi FROM progress_deleted"
+        query = f"SELECT * FROM ({live} WHERE Versi > ? UNION ALL {deleted} WHERE Versi > ?) WHERE {keyset}"
+        params, key = (int(since), int(since)), (int(since), '', -1)
+    try:
+        while True:
+            rows = conn.execute(query, params + key + (chunk_size,)).fetchall()
+            if not rows: break
+            key = (rows[-1][-2], rows[-1][0], rows[-1][1])
+            for row in rows:
+                row = (row[0], reg.user_names.get(row[1])) + row[2:]
+                if fmt == "csv":
+                    buffer.seek(0)
+                    buffer.truncate(0)
+                    writer.writerow(row)
+                    yield buffer.getvalue()
+                else:
+                    yield json.dumps(dict(zip(cols, row)), ensure_ascii=False) + "\n"
+    finally:
+        conn.close()
+
+# --- EKSPOR EXCEL SEMUA PESERTA ---
+def iter_user_rows(conn, user, chunk_size=EXPORT_CHUNK_SIZE, source="progress"):
+    """Mengambil baris progress satu peserta per potongan (chunk), tanpa DataFrame."""
+    cols = ['Tanggal'] + list(registry().habits) + EXTRA_COLS
+    cursor = conn.execute(f"SELECT {_quote_cols(cols)} FROM {source} WHERE UserId = ? ORDER BY Tanggal", (_user_id(user),))
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows: break
+        yield from rows
+
+@timed("export_all_participants_excel")
+def export_all_participants_excel(output, chunk_size=EXPORT_CHUNK_SIZE):
+    """Menulis satu sheet per peserta + sheet Ringkasan memakai workbook write-only (streaming)."""
+    from openpyxl import Workbook  # impor di sini agar job CLI non-Excel tetap ringan
+    start = time.perf_counter()
+    reg = registry()
+    habits = list(reg.habits)
+    wb = Workbook(write_only=True)
+    ws_summary = wb.create_sheet("Ringkasan")
+    ws_summary.append(["Peserta", "Jumlah Hari", "Terakhir Diisi"] + habits)
+    header = ["Tanggal"] + habits + EXTRA_COLS
+    total_rows = 0
+    conn = connect()
+    source = _progress_source(conn)
+    try:
+        for user in reg.participants:
+            ws = wb.create_sheet(f"Progress_{user}"[:31])
+            ws.append(header)
+            n_rows, last_date, totals = 0, None, [0] * len(habits)
+            for row in iter_user_rows(conn, user, chunk_size, source):
+                try: tanggal = datetime.strptime(row[0], '%Y-%m-%d')
+                except (TypeError, ValueError): continue
+                habit_values = [v or 0 for v in row[1:1 + len(habits)]]
+                ws.append([tanggal] + habit_values + [row[-1] or ''])
+                totals = [t + v for t, v in zip(totals, habit_values)]
+                n_rows, last_date = n_rows + 1, tanggal
+            ws_summary.append([user, n_rows, last_date] + totals)
+            total_rows += n_rows
+    finally:
+        conn.close()
+    wb.save(output)
+    elapsed = time.perf_counter() - start
+    return {"rows": total_rows, "sheets": len(reg.participants) + 1, "seconds": elapsed, "rows_per_sec": total_rows / elapsed if elapsed > 0 else 0.0}
+
+# --- AGREGASI (RINGKASAN, LEADERBOARD) ---
+@timed("progress_summary")
+def progress_summary(df_period, target_days=7):
+    """Capaian per ibadah untuk satu periode: (DataFrame Ibadah/Capaian, total aktual, total target)."""
+    reg = registry()
+    progress_data, total_actual, total_target = [], df_period[list(reg.habits)].sum().sum(), 0.0
+    for habit, type in reg.habits.items():
+        actual = df_period[habit].sum()
+        target = 0.0
+        if type == 'daily': target = float(target_days)
+        elif type == 'weekly': target = reg.targets[habit] * (target_days / 7.0)
+        elif type == 'monthly': target = reg.targets[habit] * (target_days / 30.0)
+        total_target += target
+        percentage = (actual / target * 100) if target > 0 else 0
+        progress_data.append({"Ibadah": habit, "Capaian (%)": percentage})
+    return pd.DataFrame(progress_data), total_actual, total_target
+
+@timed("habit_trend")
+def habit_trend(df, start, end, max_points=TREND_MAX_POINTS):
+    """Tren capaian (%) per ibadah pada [start, end] dengan resolusi yang menyesuaikan panjang rentang.
+
+    Hasil: (label resolusi, DataFrame panjang Tanggal/Ibadah/Capaian (%)) dengan paling banyak
+    max_points titik per ibadah. Resolusi harian memakai jendela bergulir 7 hari supaya ibadah
+    pekanan/bulanan tetap bermakna; resolusi lain di-resample per pekan (mulai Senin), bulan, dst.
+    Target per hari mengikuti progress_summary.
+    """
+    reg = registry()
+    days = pd.date_range(start, end, freq='D')
+    daily = df.assign(Tanggal=pd.to_datetime(df['Tanggal'], errors='coerce')).dropna(subset=['Tanggal'])
+    daily = daily.groupby(daily['Tanggal'].dt.normalize())[list(reg.habits)].sum().reindex(days, fill_value=0)
+    day_count = pd.Series(1.0, index=days)
+    for freq, label in TREND_FREQS:
+        if freq == "D":
+            if len(days) > max_points: continue
+            done, n_days = daily.rolling(7, min_periods=1).sum(), day_count.rolling(7, min_periods=1).sum()
+        else:
+            done = daily.resample(freq, closed='left', label='left').sum()
+            if len(done) > max_points and freq != TREND_FREQS[-1][0]: continue
+            n_days = day_count.resample(freq, closed='left', label='left').sum()
+        break
+    target_per_day = pd.Series({habit: 1.0 if type == 'daily' else reg.targets[habit] / (7.0 if type == 'weekly' else 30.0) for habit, type in reg.habits.items()})
+    rate = done.div(n_days, axis=0).div(target_per_day, axis=1).mul(100).round(1)
+    return label, rate.rename_axis('Tanggal').reset_index().melt(id_vars='Tanggal', var_name='Ibadah', value_name='Capaian (%)')
+
+def period_bounds(today):
+    """Awal pekan (Senin), awal bulan, dan jumlah hari bulan berjalan."""
+    start_of_week = today - timedelta(days=today.weekday())
+    start_of_month = today.replace(day=1)
+    days_in_month = (start_of_month.replace(month=start_of_month.month % 12 + 1, day=1) - timedelta(days=1)).day
+    return start_of_week, start_of_month, days_in_month
+
+def _leaderboard(data, total_target):
+    if data.empty: return pd.DataFrame(columns=["Peserta", "Progress (%)"])
+    total_actual = data.groupby('User')[list(registry().habits)].sum().sum(axis=1)
+    percentage = (total_actual / total_target * 100) if total_target > 0 else total_actual * 0
+    lb_df = pd.DataFrame({"Peserta": total_actual.index, "Progress (%)": percentage.round(2).values})
+    lb_df = lb_df.sort_values("Progress (%)", ascending=False).reset_index(drop=True)
+    lb_df.index += 1
+    return lb_df
+
+@timed("weekly_leaderboard")
+def weekly_leaderboard(all_df, today):
+    start_of_week, _, _ = period_bounds(today)
+    days = all_df['Tanggal'].dt.date
+    return _leaderboard(all_df[(days >= start_of_week) & (days <= today)], _weekly_target(registry()))
+
+def _weekly_target(reg):
+    return sum(reg.targets.get(h, 7) for h, t in reg.habits.items() if t != 'monthly')
+
+@timed("monthly_leaderboard")
+def monthly_leaderboard(all_df, today):
+    _, start_of_month, _ = period_bounds(today)
+    days_passed, num_weeks_passed = today.day, today.day / 7
+    reg, total_target = registry(), 0
+    for habit, type in reg.habits.items():
+        if type == "daily": total_target += days_passed
+        elif type == "weekly": total_target += reg.targets[habit] * num_weeks_passed
+        elif type == "monthly": total_target += reg.targets[habit]
+    days = all_df['Tanggal'].dt.date
+    return _leaderboard(all_df[(days >= start_of_month) & (days <= today)], total_target)
+
+# --- PROYEKSI AKHIR BULAN ---
+# Tiap ibadah dimodelkan sebagai kejadian harian dengan peluang = laju peserta selama
+# FORECAST_WINDOW_DAYS hari terakhir (sampai kemarin; hari ini belum tentu selesai diisi).
+FORECAST_WINDOW_DAYS = 14
+FORECAST_Z = 1.645             # pita keyakinan 90%
+FORECAST_ON_TRACK_PCT = 80.0   # proyeksi minimum agar dianggap sesuai jalur
+FORECAST_ON_TRACK, FORECAST_AT_RISK = "Sesuai Jalur", "Berisiko"
+
+def _month_targets(reg, days_in_month):
+    # Sama dengan target progress_summary untuk target_days = jumlah hari bulan
+    return np.array([float(days_in_month) if freq == 'daily' else reg.targets[habit] * days_in_month / (7.0 if freq == 'weekly' else 30.0)
+                     for habit, freq in reg.habits.items()])
+
+def _percent(values, target):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(target > 0, values / target * 100, 0.0).round(1)
+
+@timed("month_end_forecast")
+def month_end_forecast(all_df, today, users=None):
+    """Proyeksi capaian akhir bulan per peserta x ibadah dan per peserta, dihitung sekaligus sebagai matriks.
+
+    all_df harus mencakup awal bulan dan FORECAST_WINDOW_DAYS hari sebelum `today`. Proyeksi =
+    jumlah bulan ini + laju terbaru x sisa hari (termasuk hari ini bila belum diisi); varians = sisa x p(1-p) (hari-hari mendatang)
+    + sisa^2 x p(1-p)/jendela (ketidakpastian laju), p dihaluskan Laplace agar laju 0/1 tetap
+    punya pita. Hasil: (DataFrame per peserta, DataFrame panjang per peserta x ibadah), persentase
+    terhadap target sebulan penuh; Status = Sesuai Jalur bila proyeksi >= FORECAST_ON_TRACK_PCT.
+    """
+    reg = registry()
+    users = list(users) if users is not None else participants()
+    habits = list(reg.habits)
+    _, start_of_month, days_in_month = period_bounds(today)
+    window_start = today - timedelta(days=FORECAST_WINDOW_DAYS)
+    days = all_df['Tanggal'].dt.date
+    def counts(mask):
+        return all_df[mask].groupby('User')[habits].sum().reindex(users, fill_value=0).to_numpy(dtype=float)
+    actual = counts((days >= start_of_month) & (days <= today))
+    recent = counts((days >= window_start) & (days < today))
+    # Hari ini masih dihitung sebagai sisa hari bagi peserta yang belum mengisinya
+    filled_today = np.isin(users, all_df.loc[days == today, 'User'].unique())
+    remaining = (days_in_month - today.day + ~filled_today)[:, None].astype(float)
+    rate = np.clip(recent / FORECAST_WINDOW_DAYS, 0.0, 1.0)
+    smooth = (recent + 1) / (FORECAST_WINDOW_DAYS + 2)
+    variance = smooth * (1 - smooth) * (remaining + remaining ** 2 / FORECAST_WINDOW_DAYS)
+    projected = actual + rate * remaining
+    spread = FORECAST_Z * np.sqrt(variance)
+    low, high = np.maximum(projected - spread, actual), np.minimum(projected + spread, actual + remaining)
+    targets = _month_targets(reg, days_in_month)
+    # Total per peserta: varians dijumlahkan antar ibadah (diasumsikan saling bebas)
+    total, total_actual, total_target = projected.sum(axis=1), actual.sum(axis=1), targets.sum()
+    total_spread = FORECAST_Z * np.sqrt(variance.sum(axis=1))
+    per_user = pd.DataFrame({
+        "Peserta": users,
+        "Proyeksi (%)": _percent(total, total_target),
+        "Batas Bawah (%)": _percent(np.maximum(total - total_spread, total_actual), total_target),
+        "Batas Atas (%)": _percent(np.minimum(total + total_spread, total_actual + remaining[:, 0] * len(habits)), total_target),
+    })
+    per_habit = pd.DataFrame({
+        "Peserta": np.repeat(users, len(habits)),
+        "Ibadah": np.tile(habits, len(users)),
+        "Capaian (%)": _percent(actual, targets).ravel(),
+        "Proyeksi (%)": _percent(projected, targets).ravel(),
+        "Batas Bawah (%)": _percent(low, targets).ravel(),
+        "Batas Atas (%)": _percent(high, targets).ravel(),
+    })
+    for frame in (per_user, per_habit):
+        frame["Status"] = np.where(frame["Proyeksi (%)"] >= FORECAST_ON_TRACK_PCT, FORECAST_ON_TRACK, FORECAST_AT_RISK)
+    return per_user, per_habit
+
+# --- RIWAYAT PERINGKAT PEKANAN ---
+# Pekan yang sudah selesai disimpan per grup di _rank_cache; token (versi registri, versi riwayat)
+# hanya berubah bila target/peserta berubah atau ada penulisan ke tanggal sebelum pekan berjalan,
+# jadi pembaruan rutin di pekan berjalan tidak membuang hasil pekan-pekan lama.
+RANK_HISTORY_WEEKS = 8
+_rank_cache = {}  # grup -> (token, {awal pekan: DataFrame Pekan/UserId/Jumlah/Peringkat})
+_rank_cache_lock = threading.Lock()
+
+def _weekly_ranks(reg, group, first_week, last_week):
+    """Jumlah ibadah dan peringkat tiap peserta per pekan (Senin) dalam [first_week, last_week], satu query.
+
+    Agregat pekanan di-GROUP BY lalu diperingkat dengan RANK() OVER (PARTITION BY Pekan); target
+    pekanan sama untuk semua peserta, jadi urutan jumlah = urutan persentase weekly_leaderboard.
+    """
+    total = " + ".join(f'COALESCE("{h}", 0)' for h in reg.habits)
+    start, end = first_week, last_week + timedelta(days=6)
+    conn = connect()
+    source = _progress_source(conn, start, end)
+    where, params = _range_filter(start, end, group)
+    week = "date(Tanggal, '-' || ((CAST(strftime('%w', Tanggal) AS INTEGER) + 6) % 7) || ' days')"
+    df = pd.read_sql_query(f"SELECT Pekan, UserId, Jumlah, RANK() OVER (PARTITION BY Pekan ORDER BY Jumlah DESC) AS Peringkat "
+                           f"FROM (SELECT {week} AS Pekan, UserId, SUM({total}) AS Jumlah FROM {source}{where} GROUP BY Pekan, UserId)",
+                           conn, params=params)
+    conn.close()
+    df['Pekan'] = pd.to_datetime(df['Pekan']).dt.date
+    return df
+
+@timed("rank_history")
+def rank_history(weeks=RANK_HISTORY_WEEKS, today=None, group=None):
+    """Peringkat pekanan `weeks` pekan terakhir (termasuk pekan berjalan) beserta perubahannya.
+
+    Hasil: DataFrame Pekan/Peserta/Progress (%)/Peringkat/Perubahan; Perubahan = peringkat pekan
+    sebelumnya - peringkat sekarang (positif = naik), kosong bila pekan sebelumnya tidak mengisi.
+    Hanya pekan yang belum ada di cache (dan pekan berjalan) yang dihitung, dalam satu query.
+    """
+    today = today or datetime.now().date()
+    reg = registry()
+    current = period_bounds(today)[0]
+    # Satu pekan ekstra di awal sebagai pembanding Perubahan pekan pertama
+    wanted = [current - timedelta(weeks=i) for i in range(weeks, 0, -1)]
+    token = (reg.version, history_version(group))
+    with _rank_cache_lock:
+        cached_token, done_weeks = _rank_cache.get(group, (None, {}))
+        done_weeks = dict(done_weeks) if cached_token == token else {}
+    missing = [week for week in wanted if week not in done_weeks]
+    fresh = _weekly_ranks(reg, group, missing[0] if missing else current, current)
+    for week in missing:
+        done_weeks[week] = fresh[fresh['Pekan'] == week]
+    with _rank_cache_lock:
+        _rank_cache[group] = (token, done_weeks)
+    ranks = pd.concat([done_weeks[week] for week in wanted] + [fresh[fresh['Pekan'] == current]], ignore_index=True)
+    ranks = ranks.sort_values(['UserId', 'Pekan'], kind='stable')
+    previous_week, previous_rank = ranks.groupby('UserId')['Pekan'].shift(), ranks.groupby('UserId')['Peringkat'].shift()
+    consecutive = previous_week.eq(ranks['Pekan'] - timedelta(weeks=1))
+    ranks['Perubahan'] = (previous_rank - ranks['Peringkat']).where(consecutive).astype('Int64')
+    ranks = ranks[ranks['Pekan'] > wanted[0]].sort_values(['Pekan', 'Peringkat', 'UserId'], kind='stable')
+    target = _weekly_target(reg)
+    return pd.DataFrame({
+        "Pekan": ranks['Pekan'].to_numpy(),
+        "Peserta": ranks['UserId'].map(reg.user_names).to_numpy(),
+        "Progress (%)": (ranks['Jumlah'] / target * 100 if target > 0 else ranks['Jumlah'] * 0).round(2).to_numpy(),
+        "Peringkat": ranks['Peringkat'].to_numpy(),
+        "Perubahan": ranks['Perubahan'].array,
+    })
+
+@timed("build_group_report")
+def build_group_report(today=None, group=None):
+    """Satu kali baca data periode berjalan -> leaderboard pekanan/bulanan (+ proyeksi akhir bulan), streak, dan ringkasan per peserta.
+
+    Dengan `group`, hanya baris dan peserta grup itu yang dibaca (indeks Grup, Tanggal). Baris
+    setelah `today` tidak dihitung; streak dibaca dari tabel streaks (keadaan terkini), jadi untuk
+    `today` di masa lalu streak tetap menggambarkan keadaan sekarang.
+    """
+    today = today or datetime.now().date()
+    start_of_week, start_of_month, days_in_month = period_bounds(today)
+    all_df = load_all_user_data(start=min(start_of_week, start_of_month, today - timedelta(days=FORECAST_WINDOW_DAYS)), end=today, group=group)
+    if all_df.empty: all_df = pd.DataFrame(columns=registry().data_cols).astype({'Tanggal': 'datetime64[ns]'})
+    streaks = load_all_streaks(today, group).reindex(participants(group), fill_value=0)
+    summaries = []
+    days = all_df['Tanggal'].dt.date
+    in_week, in_month = (days >= start_of_week) & (days <= today), (days >= start_of_month) & (days <= today)
+    for (period, mask, target_days) in [("Pekan Ini", in_week, 7), ("Bulan Ini", in_month, days_in_month)]:
+        for user, rows in all_df[mask].groupby('User'):
+            df_progress, _, _ = progress_summary(rows, target_days)
+            summaries.append(df_progress.assign(Peserta=user, Periode=period))
+    summary_cols = ["Peserta", "Periode", "Ibadah", "Capaian (%)"]
+    forecast, forecast_habits = month_end_forecast(all_df, today, participants(group))
+    monthly, projection = monthly_leaderboard(all_df, today), forecast.set_index("Peserta")
+    monthly["Proyeksi (%)"] = monthly["Peserta"].map(projection["Proyeksi (%)"])
+    monthly["Status"] = monthly["Peserta"].map(projection["Status"])
+    return {
+        "tanggal": today,
+        "leaderboard_pekanan": weekly_leaderboard(all_df, today),
+        "leaderboard_bulanan": monthly,
+        "proyeksi_bulanan": forecast_habits,
+        "streak": streaks.rename_axis("Peserta").reset_index(),
+        "ringkasan_peserta": pd.concat(summaries, ignore_index=True)[summary_cols] if summaries else pd.DataFrame(columns=summary_cols),
+    }
+
+@timed("completion_matrix")
+def completion_matrix(start, end, users=None, group=None):
+    """Jumlah ibadah yang dikerjakan per peserta per hari dalam [start, end].
+
+    Hasil: (daftar peserta, DatetimeIndex harian, matriks int peserta x hari). Satu GROUP BY di
+    SQLite lalu diletakkan ke matriks numpy sekaligus; hari tanpa entri bernilai 0. Dengan
+    `group`, baris dan peserta dibatasi ke grup itu.
+    """
+    reg = registry()
+    users = list(users) if users is not None else participants(group)
+    days = pd.date_range(start, end, freq='D')
+    conn = connect()
+    total = " + ".join(f'COALESCE("{h}", 0)' for h in reg.habits)
+    source = _progress_source(conn, days[0], days[-1])
+    where, params = _range_filter(days[0], days[-1], group)
+    counts = pd.read_sql_query(f"SELECT UserId, Tanggal, SUM({total}) AS Jumlah FROM {source}{where} GROUP BY Tanggal, UserId", conn, params=params)
+    conn.close()
+    matrix = np.zeros((len(users), len(days)), dtype=int)
+    user_idx = pd.Index([reg.user_ids.get(user, -1) for user in users]).get_indexer(counts['UserId'])
+    day_idx = days.get_indexer(pd.to_datetime(counts['Tanggal'], errors='coerce'))
+    keep = (user_idx >= 0) & (day_idx >= 0)
+    matrix[user_idx[keep], day_idx[keep]] = counts['Jumlah'].to_numpy()[keep]
+    return users, days, matrix
+
+# --- KEPATUHAN HARIAN (ADMIN) ---
+COMPLIANCE_NONE, COMPLIANCE_PARTIAL, COMPLIANCE_DONE = 0, 1, 2
+
+def _daily_done_sql(reg, alias="p"):
+    return " AND ".join(f'{alias}."{habit}" = 1' for habit in reg.daily_habits) or "1"
+
+@timed("missing_entries")
+def missing_entries(day, group=None):
+    """Peserta aktif yang belum mengisi jurnal pada `day`, atau ibadah hariannya belum lengkap.
+
+    Satu anti-join registri peserta -> progress lewat primary key (Tanggal, UserId): biayanya
+    sebanding jumlah peserta grup, bukan panjang riwayat. Hasil: DataFrame Peserta/Grup/Status/
+    Belum Dikerjakan, urut Id peserta.
+    """
+    reg = registry()
+    daily = reg.daily_habits
+    conn = connect()
+    source = _progress_source(conn, day, day)
+    habit_cols = ", ".join(f'p."{habit}"' for habit in daily)
+    group_filter, params = ("AND ps.Grup = ?", (group,)) if group is not None else ("", ())
+    rows = conn.execute(f"SELECT ps.Nama, ps.Grup, p.Tanggal IS NOT NULL{', ' + habit_cols if daily else ''} FROM peserta ps "
+                        f"LEFT JOIN (SELECT * FROM {source} WHERE Tanggal = ?) p ON p.UserId = ps.Id "
+                        f"WHERE ps.Aktif = 1 {group_filter} AND NOT (p.Tanggal IS NOT NULL AND {_daily_done_sql(reg)}) ORDER BY ps.Id",
+                        (day.strftime('%Y-%m-%d'),) + params).fetchall()
+    conn.close()
+    result = [(name, grup, "Sudah mengisi, belum lengkap" if filled else "Belum mengisi",
+               ", ".join(habit for habit, value in zip(daily, values) if value != 1) if filled else "Semua")
+              for name, grup, filled, *values in rows]
+    return pd.DataFrame(result, columns=["Peserta", "Grup", "Status", "Belum Dikerjakan"])
+
+@timed("compliance_matrix")
+def compliance_matrix(end, days=7, group=None):
+    """Status harian peserta aktif selama `days` hari sampai `end` (DataFrame peserta x tanggal).
+
+    Nilai: COMPLIANCE_DONE (ibadah harian lengkap), COMPLIANCE_PARTIAL (mengisi, belum lengkap),
+    COMPLIANCE_NONE (tidak mengisi). Dengan `group`, dibaca lewat indeks (Grup, Tanggal).
+    """
+    reg = registry()
+    users = participants(group)
+    dates = pd.date_range(end - timedelta(days=days - 1), end, freq='D')
+    conn = connect()
+    source = _progress_source(conn, dates[0], dates[-1])
+    where, params = _range_filter(dates[0], dates[-1], group)
+    rows = pd.read_sql_query(f"SELECT UserId, Tanggal, CASE WHEN {_daily_done_sql(reg, source)} THEN {COMPLIANCE_DONE} ELSE {COMPLIANCE_PARTIAL} END AS Status "
+                             f"FROM {source}{where}", conn, params=params)
+    conn.close()
+    matrix = np.full((len(users), len(dates)), COMPLIANCE_NONE, dtype=int)
+    user_idx = pd.Index([reg.user_ids[user] for user in users]).get_indexer(rows['UserId'])
+    day_idx = dates.get_indexer(pd.to_datetime(rows['Tanggal'], errors='coerce'))
+    keep = (user_idx >= 0) & (day_idx >= 0)
+    matrix[user_idx[keep], day_idx[keep]] = rows['Status'].to_numpy()[keep]
+    return pd.DataFrame(matrix, index=pd.Index(users, name="Peserta"), columns=dates.date)
+
+# --- KETERKAITAN ANTAR IBADAH ---
+COOCCURRENCE_MAX_LAG = 7
+
+@dataclass(frozen=True)
+class HabitCooccurrence:
+    """Hitungan keterkaitan ibadah hasil habit_cooccurrence: sumbu 0 = peserta, sumbu 1/2 = ibadah (A, B)."""
+    users: tuple
+    habits: tuple
+    lag: int
+    days: np.ndarray       # (U,) jumlah hari terisi
+    counts: np.ndarray     # (U, H, H) hari A dan B sama-sama dikerjakan; diagonal = jumlah hari A
+    lagged: np.ndarray     # (U, H, H) A pada hari d dan B pada hari d + lag
+    lag_base: np.ndarray   # (U, H) A pada hari d dan hari d + lag juga terisi
+
+    def _select(self, user):
+        if user is None: return self.days.sum(), self.counts.sum(axis=0), self.lagged.sum(axis=0), self.lag_base.sum(axis=0)
+        i = self.users.index(user)
+        return self.days[i], self.counts[i], self.lagged[i], self.lag_base[i]
+
+    def frames(self, user=None):
+        """DataFrame ibadah A (baris) x ibadah B (kolom) untuk satu peserta, atau gabungan semua peserta bila user None.
+
+        Bersamaan: jumlah hari A dan B dikerjakan; Lift: P(A dan B) / (P(A) P(B)) pada hari yang sama
+        (> 1 = sering bersamaan); Peluang Lanjut (%): P(B pada hari d + lag | A pada hari d).
+        """
+        days, counts, lagged, base = self._select(user)
+        freq = np.diag(counts)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lift = counts * days / np.outer(freq, freq)
+            follow = lagged / base[:, None] * 100
+        index = pd.Index(self.habits, name="Ibadah")
+        return {"Bersamaan": pd.DataFrame(counts, index=index, columns=self.habits),
+                "Lift": pd.DataFrame(lift, index=index, columns=self.habits).round(2),
+                "Peluang Lanjut (%)": pd.DataFrame(follow, index=index, columns=self.habits).round(1)}
+
+    def pair(self, habit_a, habit_b):
+        """Keterkaitan A -> B untuk tiap peserta sekaligus (DataFrame per peserta)."""
+        a, b = self.habits.index(habit_a), self.habits.index(habit_b)
+        freq_a, freq_b, both = self.counts[:, a, a], self.counts[:, b, b], self.counts[:, a, b]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lift = both * self.days / (freq_a * freq_b)
+            follow = self.lagged[:, a, b] / self.lag_base[:, a] * 100
+        return pd.DataFrame({"Peserta": self.users, "Hari Terisi": self.days, f"Hari {habit_a}": freq_a, "Hari Bersamaan": both,
+                             "Lift": np.round(lift, 2), "Peluang Lanjut (%)": np.round(follow, 1)})
+
+@timed("habit_cooccurrence")
+def habit_cooccurrence(start, end, users=None, group=None, lag=1):
+    """Keterkaitan antar ibadah per peserta dalam [start, end]; lihat HabitCooccurrence.
+
+    Satu query membaca bitmask ibadah per (peserta, hari); bitmask dibongkar ke tensor boolean
+    peserta x hari x ibadah X, lalu semua pasangan ibadah untuk semua peserta dihitung dengan satu
+    perkalian matriks batch: X^T X (hari yang sama) dan X[:-lag]^T X[lag:] (lag hari kemudian).
+    Hari tanpa entri bernilai nol dan tidak dihitung sebagai hari terisi.
+    """
+    if not 0 <= lag <= COOCCURRENCE_MAX_LAG: raise ValueError(f"lag harus 0..{COOCCURRENCE_MAX_LAG}.")
+    reg = registry()
+    users = list(users) if users is not None else participants(group)
+    habits = list(reg.habits)
+    n_days = max((end - start).days + 1, 0)
+    mask = " | ".join(f'((COALESCE("{habit}", 0) = 1) << {i})' for i, habit in enumerate(habits)) or "0"
+    conn = connect()
+    source = _progress_source(conn, start, end)
+    where, params = _range_filter(start, end, group)
+    # Satu string per peserta berisi (hari ke- << jumlah ibadah) | bitmask: jauh lebih sedikit objek
+    # Python daripada satu tuple per baris
+    packed = f"(CAST(julianday(Tanggal) - julianday(?) AS INTEGER) << {len(habits)}) | {mask}"
+    rows = conn.execute(f"SELECT UserId, group_concat({packed}) FROM {source}{where} GROUP BY UserId",
+                        (start.strftime('%Y-%m-%d'),) + params).fetchall()
+    conn.close()
+    chunks = [np.array(joined.split(','), dtype=np.int64) for _, joined in rows]
+    values = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int64)
+    user_ids = np.repeat([user_id for user_id, _ in rows], [len(chunk) for chunk in chunks]).astype(np.int64)
+    user_idx = pd.Index([reg.user_ids.get(user, -1) for user in users]).get_indexer(user_ids)
+    day_idx, bitmask = values >> len(habits), values & ((1 << len(habits)) - 1)
+    keep = (user_idx >= 0) & (day_idx >= 0) & (day_idx < n_days)
+    user_idx, day_idx, bitmask = user_idx[keep], day_idx[keep], bitmask[keep]
+    present = np.zeros((len(users), n_days), dtype=bool)
+    present[user_idx, day_idx] = True
+    # float32 agar matmul lewat BLAS; hitungan bulat tetap eksak sampai 2^24
+    x = np.zeros((len(users), n_days, len(habits)), dtype=np.float32)
+    x[user_idx, day_idx] = (bitmask[:, None] >> np.arange(len(habits))) & 1
+    head, tail = x[:, :max(n_days - lag, 0)], x[:, lag:]
+    return HabitCooccurrence(
+        users=tuple(users), habits=tuple(habits), lag=lag, days=present.sum(axis=1),
+        counts=(x.transpose(0, 2, 1) @ x).astype(np.int64),
+        lagged=(head.transpose(0, 2, 1) @ tail).astype(np.int64),
+        lag_base=(head * present[:, lag:, None]).sum(axis=1).astype(np.int64),
+    )
+
+@timed("user_excel_bytes")
+def user_excel_bytes(df, username):
+    """Berkas Excel 'Unduh Semua Data' untuk satu peserta."""
+    output_excel = io.BytesIO()
+    with pd.ExcelWriter(output_excel, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name=f'Progress_{username}')
+    return output_excel.getvalue()
+
+@timed("df_to_pdf")
+def df_to_pdf(df, title="Laporan Progress"):
+    from fpdf import FPDF  # impor di sini agar job CLI non-PDF tetap ringan
+    pdf = FPDF(orientation='L', unit='mm', format='A4')
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 16)
+    pdf.cell(0, 10, title, 0, 1, "C")
+    pdf.ln(5)
+    pdf.set_font("Arial", "B", 7)
+    headers = df.columns.tolist()
+    col_widths = {'Tanggal': 25, 'Catatan': 50}
+    num_habit_cols = len(headers) - len(col_widths)
+    default_width = (297 - 20 - sum(col_widths.values())) / num_habit_cols if num_habit_cols > 0 else 20
+    for header in headers:
+        width = col_widths.get(header, default_width)
+        pdf.cell(width, 10, header, 1, 0, "C")
+    pdf.ln()
+    pdf.set_font("Arial", "", 7)
+    for _, row in df.iterrows():
+        for header in headers:
+            width = col_widths.get(header, default_width)
+            cell_text = row[header].strftime('%Y-%m-%d') if isinstance(row[header], (pd.Timestamp, datetime)) else str(row[header])
+            # Font inti PDF hanya mendukung latin-1 (catatan bisa berisi emoji)
+            pdf.cell(width, 10, cell_text.encode('latin-1', 'replace').decode('latin-1'), 1, 0, "C")
+        pdf.ln()
+    return bytes(pdf.output())
@@ -0,0 +1,301 @@
+"""Harness uji beban sesi bersamaan untuk app4.py.
+
+Setiap sesi simulasi (seeded) memilih nama peserta, mengisi jurnal, mengedit
+jurnal yang sama, lalu membuka leaderboard. Driver "apptest" menjalankan app4.py
+sungguhan lewat streamlit.testing AppTest; driver "headless" memanggil fungsi
+letstracker_core yang sama seperti satu rerun app (lebih ringan, untuk ratusan sesi).
+Sesi dibagi ke beberapa proses, masing-masing dengan beberapa thread. AppTest
+berbagi runtime global Streamlit, jadi driver "apptest" memakai satu thread per
+proses dan konkurensinya diatur lewat --processes.
+
+Tiap sesi memiliki rentang tanggal sendiri, sehingga isi akhir database dapat
+diverifikasi: penulisan yang sukses tetapi tidak ada di database = lost write.
+
+Dengan --backup-interval, proses utama menjalankan letstracker_backup.create_backup()
+berulang selama uji berjalan dan laporan memisahkan latensi submit yang terjadi saat
+backup berlangsung dari yang tidak.
+
+Contoh:
+    python letstracker_loadtest.py --sessions 100 --processes 4 --threads 8 --seed 7
+    python letstracker_loadtest.py --driver apptest --sessions 10 --processes 10
+    python letstracker_loadtest.py --sessions 100 --threads 8 --backup-interval 0.5
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+ACTIONS = ("open", "submit", "edit", "leaderboard")
+
+
+def _session_plan(seed, session_index, iterations, participants, habits):
+    """Rencana deterministik satu sesi: nama + daftar (tanggal, nilai submit, nilai edit)."""
+    rng = random.Random(seed * 1_000_003 + session_index)
+    name = rng.choice(participants)
+    today = datetime.now().date()
+    steps = []
+    for k in range(iterations):
+        day = today - timedelta(days=1 + session_index * iterations + k)
+        submit = {h: rng.randint(0, 1) for h in habits}
+        submit["Catatan"] = f"lt-{seed}-{session_index}-{k}-a"
+        edit = dict(submit, Catatan=f"lt-{seed}-{session_index}-{k}-b") if rng.random() < 0.5 else None
+        steps.append((day, submit, edit))
+    return name, steps
+
+
+def _is_lock_error(message):
+    return "locked" in message or "busy" in message
+
+
+class HeadlessSession:
+    """Urutan panggilan yang sama dengan satu rerun app4.py, tanpa Streamlit."""
+
+    def __init__(self, core):
+        self.core = core
+
+    def open(self, name, day):
+        self.core.load_data(name)
+
+    def submit(self, name, day, values):
+        self.core.upsert_data(datetime.combine(day, datetime.min.time()), name, values)
+
+    def leaderboard(self, name):
+        all_df = self.core.load_all_user_data()
+        if not all_df.empty:
+            today = datetime.now().date()
+            self.core.weekly_leaderboard(all_df, today)
+            self.core.monthly_leaderboard(all_df, today)
+
+
+class AppTestSession:
+    """Menjalankan app4.py lewat AppTest: pilih nama/tanggal di sidebar, isi form, submit."""
+
+    def __init__(self, app_path):
+        from streamlit.testing.v1 import AppTest
+        self.at = AppTest.from_file(app_path, default_timeout=120)
+        self.at.run()
+
+    def _raise_app_errors(self):
+        if self.at.exception:
+            raise RuntimeError("; ".join(str(e.value) for e in self.at.exception))
+
+    def open(self, name, day):
+        self.at.sidebar.selectbox[0].set_value(name)
+        self.at.sidebar.date_input[0].set_value(day)
+        self.at.run()
+        self._raise_app_errors()
+
+    def submit(self, name, day, values):
+        for box in self.at.main.checkbox:
+            if box.label in values: box.set_value(bool(values[box.label]))
+        self.at.main.text_area[0].input(values["Catatan"])
+        next(b for b in self.at.main.button if "Jurnal" in b.label).click()
+        self.at.run()
+        self._raise_app_errors()
+
+    def leaderboard(self, name):
+        # Semua tab dirender tiap rerun; membuka leaderboard = satu rerun penuh
+        self.at.run()
+        self._raise_app_errors()
+
+
+def _run_session(driver, app_path, seed, session_index, iterations):
+    import letstracker_core as core
+    name, steps = _session_plan(seed, session_index, iterations, core.PARTICIPANTS, list(core.HABITS))
+    samples, writes = [], []
+
+    def measure(action, fn, *args):
+        started_at, start = time.time(), time.perf_counter()
+        error = None
+        try:
+            fn(*args)
+        except Exception as exc:  # dicatat sebagai sampel gagal, sesi berlanjut
+            error = str(exc)
+        samples.append((action, time.perf_counter() - start, error, started_at))
+        return error is None
+
+    try:
+        session = AppTestSession(app_path) if driver == "apptest" else HeadlessSession(core)
+    except Exception as exc:
+        return [("open", 0.0, f"gagal memulai sesi: {exc}", time.time())], []
+    for day, submit, edit in steps:
+        measure("open", session.open, name, day)
+        if measure("submit", session.submit, name, day, submit):
+            writes.append((day.isoformat(), name, submit))
+        if edit is not None and measure("edit", session.submit, name, day, edit):
+            writes.append((day.isoformat(), name, edit))
+        measure("leaderboard", session.leaderboard, name)
+    return samples, writes
+
+
+def _run_worker(driver, app_path, db_file, seed, session_indices, iterations, threads):
+    os.environ["LETSTRACKER_DB"] = db_file
+    import letstracker_core as core
+    core.DB_FILE = db_file
+    core.init_db()
+    samples, writes = [], []
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for s, w in pool.map(lambda i: _run_session(driver, app_path, seed, i, iterations), session_indices):
+            samples += s
+            writes += w
+    return samples, writes
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    if not values: return 0.0
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def _copy_archives(db, db_file):
+    """Menyalin berkas arsip tahunan milik `db` agar salinan database tetap bisa membaca tahun arsip."""
+    import letstracker_core as core
+    conn = sqlite3.connect(db_file)
+    try:
+        years = [year for (year,) in conn.execute("SELECT Tahun FROM arsip_tahun")]
+    except sqlite3.OperationalError:  # database sebelum fitur arsip
+        years = []
+    conn.close()
+    for year in years:
+        shutil.copyfile(core.archive_path(year, db), core.archive_path(year, db_file))
+
+
+def _backup_loop(db_file, dest_dir, interval, stop, windows, stats):
+    """Backup berulang di thread proses utama; mencatat jendela waktu (mulai, selesai) tiap backup."""
+    import letstracker_core as core
+    import letstracker_backup as backup
+    core.DB_FILE = db_file
+    while not stop.wait(interval):
+        started_at = time.time()
+        stats.append(backup.create_backup(dest_dir, keep=2))
+        windows.append((started_at, time.time()))
+
+
+def _latency_stats(latencies):
+    return {"count": len(latencies), "p50_ms": _percentile(latencies, 0.5) * 1000,
+            "p95_ms": _percentile(latencies, 0.95) * 1000, "p99_ms": _percentile(latencies, 0.99) * 1000}
+
+
+def verify_writes(db_file, writes):
+    """Nilai terakhir yang sukses ditulis tiap (Tanggal, User) harus ada di database."""
+    import letstracker_core as core
+    expected = {}
+    for tanggal, user, values in writes:
+        expected[(tanggal, user)] = values
+    conn = sqlite3.connect(db_file)
+    cols = ", ".join(f'"{h}"' for h in core.HABITS)
+    user_ids = core.registry(refresh=True).user_ids
+    lost = 0
+    for (tanggal, user), values in expected.items():
+        row = conn.execute(f"SELECT {cols}, Catatan FROM progress WHERE Tanggal = ? AND UserId = ?", (tanggal, user_ids[user])).fetchone()
+        if row is None or list(row) != [values[h] for h in core.HABITS] + [values["Catatan"]]:
+            lost += 1
+    conn.close()
+    return lost, len(expected)
+
+
+def run_load_test(driver="headless", sessions=20, iterations=3, processes=1, threads=4, seed=0, db=None, app_path=None,
+                  backup_interval=None):
+    if driver == "apptest": threads = 1
+    app_path = app_path or os.path.join(os.path.dirname(os.path.abspath(__file__)), "app4.py")
+    workdir = tempfile.mkdtemp(prefix="letstracker_load_")
+    db_file = os.path.join(workdir, "letstracker.db")
+    if db:
+        shutil.copyfile(db, db_file)
+        _copy_archives(db, db_file)
+    chunks = [list(range(sessions))[p::processes] for p in range(processes)]
+    start = time.perf_counter()
+    samples, writes = [], []
+    stop_backup, backup_windows, backup_stats = threading.Event(), [], []
+    if backup_interval:
+        if not os.path.exists(db_file):
+            import letstracker_core as core
+            core.DB_FILE = db_file
+            core.init_db()
+        backup_thread = threading.Thread(target=_backup_loop, args=(db_file, os.path.join(workdir, "backups"), backup_interval,
+                                                                     stop_backup, backup_windows, backup_stats), daemon=True)
+        backup_thread.start()
+    try:
+        if processes == 1:
+            samples, writes = _run_worker(driver, app_path, db_file, seed, chunks[0], iterations, threads)
+        else:
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                futures = [pool.submit(_run_worker, driver, app_path, db_file, seed, chunk, iterations, threads) for chunk in chunks]
+                for future in futures:
+                    s, w = future.result()
+                    samples += s
+                    writes += w
+        elapsed = time.perf_counter() - start
+        if backup_interval:
+            stop_backup.set()
+            backup_thread.join()
+        lost, keys = verify_writes(db_file, writes)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {"driver": driver, "seed": seed, "sessions": sessions, "iterations": iterations, "processes": processes,
+              "threads": threads, "seconds": elapsed, "operations": len(samples),
+              "throughput_ops_per_sec": len(samples) / elapsed if elapsed > 0 else 0.0,
+              "lock_errors": sum(1 for _, _, err, _ in samples if err and _is_lock_error(err)),
+              "other_errors": sum(1 for _, _, err, _ in samples if err and not _is_lock_error(err)),
+              "lost_writes": lost, "verified_keys": keys, "actions": {}}
+    for action in ACTIONS:
+        report["actions"][action] = _latency_stats([lat for a, lat, err, _ in samples if a == action and err is None])
+    if backup_interval:
+        def during_backup(started_at, latency):
+            return any(begin < started_at + latency and started_at < end for begin, end in backup_windows)
+        submits = [(lat, during_backup(at, lat)) for a, lat, err, at in samples if a in ("submit", "edit") and err is None]
+        report["backup"] = {"count": len(backup_stats),
+                            "seconds": _latency_stats([b["seconds"] for b in backup_stats]),
+                            "max_step_ms": max((b["max_step_seconds"] * 1000 for b in backup_stats), default=0.0),
+                            "restarts": sum(b["restarts"] for b in backup_stats),
+                            "submit_during_backup": _latency_stats([lat for lat, during in submits if during]),
+                            "submit_outside_backup": _latency_stats([lat for lat, during in submits if not during])}
+    errors = sorted({err for _, _, err, _ in samples if err})
+    report["error_samples"] = errors[:5]
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Uji beban sesi bersamaan LetsTracker")
+    parser.add_argument("--driver", choices=["headless", "apptest"], default="headless")
+    parser.add_argument("--sessions", type=int, default=20, help="Jumlah sesi simulasi")
+    parser.add_argument("--iterations", type=int, default=3, help="Jurnal per sesi")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=4, help="Thread per proses")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db", help="Salinan awal database (default: database kosong)")
+    parser.add_argument("--json", help="Tulis laporan lengkap ke berkas JSON")
+    parser.add_argument("--backup-interval", type=float, help="Jalankan backup online tiap N detik selama uji")
+    args = parser.parse_args(argv)
+    report = run_load_test(args.driver, args.sessions, args.iterations, args.processes, args.threads, args.seed, args.db,
+                           backup_interval=args.backup_interval)
+    print(f"{report['operations']} operasi dalam {report['seconds']:.2f} detik "
+          f"({report['throughput_ops_per_sec']:.1f} op/detik), lock error: {report['lock_errors']}, "
+          f"error lain: {report['other_errors']}, lost write: {report['lost_writes']}/{report['verified_keys']}")
+    for action, stats in report["actions"].items():
+        print(f"  {action:<12} n={stats['count']:<5} p50={stats['p50_ms']:.1f} ms  p95={stats['p95_ms']:.1f} ms  p99={stats['p99_ms']:.1f} ms")
+    if "backup" in report:
+        backup = report["backup"]
+        print(f"backup: {backup['count']} kali, p50={backup['seconds']['p50_ms']:.0f} ms, langkah terlama={backup['max_step_ms']:.1f} ms, "
+              f"restart={backup['restarts']}")
+        for label, key in (("submit saat backup", "submit_during_backup"), ("submit di luar", "submit_outside_backup")):
+            stats = backup[key]
+            print(f"  {label:<20} n={stats['count']:<5} p50={stats['p50_ms']:.1f} ms  p95={stats['p95_ms']:.1f} ms  p99={stats['p99_ms']:.1f} ms")
+    for err in report["error_samples"]:
+        print(f"  ! {err}", file=sys.stderr)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Metrik format teks Prometheus untuk proses LetsTracker.
+
+Aktif bila LETSTRACKER_METRICS_PORT diisi: start_server() memasang listener di
+letstracker_perf (rerun, span, cache) dan menyajikan GET /metrics dari thread latar.
+Statement SQL ikut diukur (sqltrace.TIMING) agar latensi per statement terukur; EXPLAIN dan
+log query lambat tetap hanya aktif dengan LETSTRACKER_SQL_TRACE=1.
+"""
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import letstracker_perf as perf
+import letstracker_sqltrace as sqltrace
+
+METRICS_PORT = int(os.environ.get("LETSTRACKER_METRICS_PORT", "0") or 0)
+SESSION_TTL = 300  # detik tanpa rerun sebelum sesi dianggap tidak aktif
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + ([extra] if extra else [])
+    if not pairs: return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines += self._render_items(items)
+        return lines
+
+    def _render_items(self, items):
+        return [f"{self.name}{_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=(), fn=None):
+        super().__init__(name, help, labelnames)
+        self._fn = fn
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def render(self):
+        if self._fn is not None: self.set(self._fn())
+        return super().render()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound: counts[i] += 1
+            counts[-1] += 1
+            self._values[key] = (counts, total + value)
+
+    def _render_items(self, items):
+        lines = []
+        for key, (counts, total) in items:
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, ('le', le))} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {counts[-1]}")
+        return lines
+
+
+REGISTRY = []
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def touch_session(session_id):
+    """Dipanggil tiap rerun; sesi yang tidak rerun selama SESSION_TTL tidak dihitung aktif."""
+    now = time.time()
+    with _sessions_lock:
+        _sessions[session_id] = now
+        for sid, seen in list(_sessions.items()):
+            if now - seen > SESSION_TTL: del _sessions[sid]
+
+
+def _active_sessions():
+    cutoff = time.time() - SESSION_TTL
+    with _sessions_lock:
+        return sum(1 for seen in _sessions.values() if seen >= cutoff)
+
+
+RERUN_SECONDS = Histogram("letstracker_rerun_duration_seconds", "Durasi satu rerun skrip Streamlit", ["app"])
+SUBMISSIONS = Counter("letstracker_journal_submissions_total", "Jumlah penulisan jurnal", ["op"])
+SUBMIT_SECONDS = Histogram("letstracker_journal_submit_duration_seconds", "Latensi penulisan jurnal (upsert/delete)", ["op"])
+DB_STATEMENT_SECONDS = Histogram("letstracker_db_statement_duration_seconds", "Latensi statement SQLite (execute + fetch)",
+                                 buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0))
+STORAGE_SECONDS = Histogram("letstracker_storage_duration_seconds", "Latensi fungsi penyimpanan", ["fn"])
+CACHE_REQUESTS = Counter("letstracker_cache_requests_total", "Panggilan cache (loader st.cache_data, figur Plotly) menurut hasil", ["cache", "result"])
+EXPORT_SECONDS = Histogram("letstracker_export_duration_seconds", "Waktu pembuatan ekspor/laporan", ["kind"])
+BACKUP_SECONDS = Histogram("letstracker_backup_duration_seconds", "Durasi backup online (salin + kompresi)",
+                           buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+ACTIVE_SESSIONS = Gauge("letstracker_active_sessions", f"Sesi dengan rerun dalam {SESSION_TTL} detik terakhir", fn=_active_sessions)
+
+SUBMIT_SPANS = {"upsert_data": "upsert", "delete_data": "delete"}
+STORAGE_SPANS = {"load_data", "load_all_user_data"}
+EXPORT_SPANS = {"user_excel_bytes", "df_to_pdf", "export_all_participants_excel", "iter_progress_export"}
+
+
+def _on_event(event, name, value):
+    if event == "run":
+        RERUN_SECONDS.observe(value, app=name)
+    elif event == "cache":
+        CACHE_REQUESTS.inc(cache=name, result="hit" if value else "miss")
+    elif name == "sql":
+        DB_STATEMENT_SECONDS.observe(value)
+    elif name in SUBMIT_SPANS:
+        SUBMISSIONS.inc(op=SUBMIT_SPANS[name])
+        SUBMIT_SECONDS.observe(value, op=SUBMIT_SPANS[name])
+        STORAGE_SECONDS.observe(value, fn=name)
+    elif name in STORAGE_SPANS:
+        STORAGE_SECONDS.observe(value, fn=name)
+    elif name in EXPORT_SPANS:
+        EXPORT_SECONDS.observe(value, kind=name)
+    elif name == "backup":
+        BACKUP_SECONDS.observe(value)
+
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(port=METRICS_PORT, host="127.0.0.1"):
+    """Memasang listener dan menjalankan endpoint /metrics di thread daemon; sekali per proses."""
+    perf.add_listener(_on_event)
+    sqltrace.TIMING = True
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="letstracker-metrics", daemon=True).start()
+    return server
@@ -0,0 +1,175 @@
+"""Instrumentasi waktu opsional untuk LetsTracker (aktif bila LETSTRACKER_PROFILE=1).
+
+Setiap rerun Streamlit (atau job CLI) dibuka dengan start_run() dan ditutup dengan
+finish_run(). Di antaranya, blok `with timed("nama")` dan fungsi ber-dekorator
+`@timed("nama")` dicatat ke run milik thread yang sedang berjalan: offset mulai,
+durasi, jumlah panggilan, serta hit/miss cache. Run yang selesai disimpan dalam
+riwayat bergulir untuk p50/p95. Listener (mis. letstracker_metrics) menerima setiap
+run, span, dan hasil cache meski panel profiling tidak aktif. Tanpa flag maupun
+listener, timed() hanya meneruskan panggilan.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+ENABLED = os.environ.get("LETSTRACKER_PROFILE") == "1"
+HISTORY_SIZE = 200
+
+_local = threading.local()
+_history = deque(maxlen=HISTORY_SIZE)
+_history_lock = threading.Lock()
+_listeners = []
+
+
+class Run:
+    def __init__(self, label=""):
+        self.label = label
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.total = None
+        self.spans = []  # (nama, offset_mulai, durasi, kedalaman)
+        self.calls = {}
+        self.cache = {}  # nama -> [hit, miss]
+        self.depth = 0
+
+    def to_dict(self):
+        return {"label": self.label, "started_at": self.started_at, "total": self.total,
+                "spans": [{"name": n, "start": s, "duration": d, "depth": depth} for n, s, d, depth in self.spans],
+                "calls": self.calls, "cache": self.cache}
+
+
+def current_run():
+    return getattr(_local, "run", None)
+
+
+def add_listener(fn):
+    """fn(event, name, value) dipanggil untuk event "run" (detik), "span" (detik), dan "cache" (hit: bool)."""
+    _listeners.append(fn)
+
+
+def _notify(event, name, value):
+    for fn in _listeners:
+        fn(event, name, value)
+
+
+def start_run(label=""):
+    if not (ENABLED or _listeners): return None
+    _local.run = Run(label)
+    return _local.run
+
+
+def finish_run():
+    run = current_run()
+    if run is None: return None
+    run.total = time.perf_counter() - run._t0
+    _local.run = None
+    if ENABLED:
+        with _history_lock:
+            _history.append(run)
+    _notify("run", run.label, run.total)
+    return run
+
+
+class timed:
+    """Context manager sekaligus dekorator: `with timed("x"):` atau `@timed("x")`."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self._run = current_run()
+        self._active = self._run is not None or bool(_listeners)
+        if self._active:
+            self._start = time.perf_counter()
+        if self._run is not None:
+            self._depth = self._run.depth
+            self._run.depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        if not self._active: return False
+        duration = time.perf_counter() - self._start
+        run = self._run
+        if run is not None:
+            run.depth -= 1
+            run.spans.append((self.name, self._start - run._t0, duration, self._depth))
+            run.calls[self.name] = run.calls.get(self.name, 0) + 1
+        _notify("span", self.name, duration)
+        return False
+
+    def __call__(self, fn):
+        name = self.name
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if current_run() is None and not _listeners:
+                return fn(*args, **kwargs)
+            with timed(name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+def record_cache(name, hit):
+    """Mencatat satu hit/miss cache `name` ke run aktif (untuk cache di luar st.cache_data)."""
+    run = current_run()
+    if run is None: return
+    run.cache.setdefault(name, [0, 0])[0 if hit else 1] += 1
+    _notify("cache", name, hit)
+
+
+def cache_tracked(cached_fn, timer_name):
+    """Membungkus fungsi st.cache_data: bila fungsi asli (ber-@timed timer_name) tidak jalan, itu hit."""
+
+    @functools.wraps(cached_fn)
+    def wrapper(*args, **kwargs):
+        run = current_run()
+        if run is None:
+            return cached_fn(*args, **kwargs)
+        before = run.calls.get(timer_name, 0)
+        result = cached_fn(*args, **kwargs)
+        record_cache(timer_name, run.calls.get(timer_name, 0) == before)
+        return result
+    wrapper.clear = getattr(cached_fn, "clear", None)
+    return wrapper
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    if not values: return 0.0
+    k = (len(values) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def history():
+    with _history_lock:
+        return list(_history)
+
+
+def rolling_stats(runs=None):
+    """p50/p95 (detik) per nama timer dan untuk rerun total, atas riwayat bergulir."""
+    runs = history() if runs is None else runs
+    per_name = {}
+    for run in runs:
+        totals = {}
+        for name, _, duration, _ in run.spans:
+            totals[name] = totals.get(name, 0.0) + duration
+        for name, total in totals.items():
+            per_name.setdefault(name, []).append(total)
+    rows = [{"name": "(rerun)", "runs": len(runs), "p50": _percentile([r.total for r in runs], 0.5),
+             "p95": _percentile([r.total for r in runs], 0.95)}]
+    for name, values in sorted(per_name.items(), key=lambda kv: -_percentile(kv[1], 0.95)):
+        rows.append({"name": name, "runs": len(values), "p50": _percentile(values, 0.5), "p95": _percentile(values, 0.95)})
+    return rows
+
+
+def dump_json(path=None):
+    """Riwayat run + statistik bergulir sebagai JSON (ditulis ke path bila diberikan)."""
+    payload = json.dumps({"runs": [run.to_dict() for run in history()], "stats": rolling_stats()}, indent=2)
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(payload)
+    return payload
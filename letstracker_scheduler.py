@@ -0,0 +1,118 @@
+"""Precompute leaderboard dan ringkasan grup di thread latar (satu per proses server).
+
+Scheduler menghitung ulang build_group_report() setelah ada penulisan (di-debounce),
+saat pergantian hari (tengah malam; pekan baru dimulai Senin tengah malam), dan bila
+versi data berubah dari proses lain (dicek berkala). Hasilnya diterbitkan sebagai
+Snapshot immutable; tab Leaderboard cukup membaca referensi snapshot terakhir.
+Tiap grup punya snapshot, penanda dirty, dan token versi sendiri: penulisan di satu grup
+hanya menghitung ulang laporan grup itu.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import letstracker_core as core
+
+DEBOUNCE_SECONDS = 2.0
+POLL_SECONDS = 30.0
+
+logger = logging.getLogger("letstracker.scheduler")
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Hasil precompute; frame di dalamnya dipakai bersama antar sesi, jangan diubah."""
+    computed_at: datetime
+    group: str
+    data_version: int
+    today: object
+    leaderboard_pekanan: pd.DataFrame
+    leaderboard_bulanan: pd.DataFrame
+    streak: pd.DataFrame
+    ringkasan_peserta: pd.DataFrame
+    proyeksi_bulanan: pd.DataFrame
+
+    @property
+    def age_seconds(self):
+        return (datetime.now() - self.computed_at).total_seconds()
+
+
+def _next_midnight(now):
+    return datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+
+
+class PrecomputeScheduler(threading.Thread):
+    def __init__(self, debounce=DEBOUNCE_SECONDS, poll=POLL_SECONDS):
+        super().__init__(name="letstracker-precompute", daemon=True)
+        self.debounce, self.poll = debounce, poll
+        self._wake = threading.Event()
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._dirty_since = {}
+        self._snapshots = {}
+
+    def notify_write(self, user=None, date_str=None):
+        """Dipasang sebagai write listener core; perhitungan ulang grup penulis menunggu debounce."""
+        reg = core.registry()
+        groups = [reg.user_groups[user]] if user in reg.user_groups else list(reg.groups)
+        with self._lock:
+            # Waktu penulisan pertama yang belum dihitung: rentetan penulisan digabung,
+            # tetapi tidak bisa menunda perhitungan ulang tanpa batas
+            for group in groups:
+                self._dirty_since.setdefault(group, time.monotonic())
+        self._wake.set()
+
+    @property
+    def pending(self):
+        return bool(self._dirty_since)
+
+    def is_pending(self, group=core.DEFAULT_GROUP):
+        return group in self._dirty_since
+
+    def snapshot(self, group=core.DEFAULT_GROUP, wait=0.0):
+        """Snapshot terakhir grup (None bila belum pernah selesai dihitung dalam `wait` detik)."""
+        if group not in self._snapshots and wait:
+            self._ready.wait(wait)
+        return self._snapshots.get(group)
+
+    def _recompute(self, group):
+        with self._lock:
+            self._dirty_since.pop(group, None)
+        version = core.current_data_version(group)
+        today = datetime.now().date()
+        report = core.build_group_report(today, group)
+        self._snapshots[group] = Snapshot(datetime.now(), group, version, today, report["leaderboard_pekanan"],
+                                          report["leaderboard_bulanan"], report["streak"], report["ringkasan_peserta"],
+                                          report["proyeksi_bulanan"])
+        if len(self._snapshots) >= len(core.registry().groups): self._ready.set()
+
+    def _due(self, group, now, poll):
+        snap = self._snapshots.get(group)
+        if snap is None or snap.today != now.date(): return True
+        dirty_since = self._dirty_since.get(group)
+        if dirty_since is not None and time.monotonic() - dirty_since >= self.debounce: return True
+        return poll and core.current_data_version(group) != snap.data_version
+
+    def run(self):
+        next_poll = time.monotonic() + self.poll
+        while True:
+            try:
+                now = datetime.now()
+                poll = time.monotonic() >= next_poll
+                if poll: next_poll = time.monotonic() + self.poll
+                for group in core.registry().groups:
+                    if self._due(group, now, poll): self._recompute(group)
+            except Exception:
+                logger.exception("Precompute leaderboard gagal, dicoba lagi nanti")
+                time.sleep(self.poll)
+                continue
+            now = datetime.now()
+            timeout = min((_next_midnight(now) - now).total_seconds(), max(0.0, next_poll - time.monotonic()))
+            for dirty_since in list(self._dirty_since.values()):
+                timeout = min(timeout, max(0.0, dirty_since + self.debounce - time.monotonic()))
+            self._wake.wait(timeout)
+            self._wake.clear()
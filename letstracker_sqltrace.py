@@ -0,0 +1,153 @@
+"""Tracing query SQLite dan log query lambat (aktif bila LETSTRACKER_SQL_TRACE=1).
+
+letstracker_core.connect() memakai TracedConnection saat tracing aktif (atau TIMING, yang
+hanya mengukur durasi statement sebagai span "sql" untuk /metrics). Setiap
+statement dihitung dan diukur (execute + fetch), tercatat sebagai span "sql" di
+letstracker_perf, dan dirangkum per bentuk query. Statement yang melewati
+SLOW_QUERY_MS ditulis ke log berotasi bersama EXPLAIN QUERY PLAN-nya; rencana
+yang memindai seluruh tabel ("SCAN <tabel>") ditandai sekali per bentuk query.
+"""
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+
+from letstracker_perf import timed
+
+ENABLED = os.environ.get("LETSTRACKER_SQL_TRACE") == "1"
+# Hanya span "sql" (dipakai histogram /metrics), tanpa statistik, EXPLAIN, dan log query lambat
+TIMING = False
+SLOW_QUERY_MS = float(os.environ.get("LETSTRACKER_SLOW_QUERY_MS", "50"))
+SLOW_LOG_FILE = os.environ.get("LETSTRACKER_SLOW_LOG", "letstracker_slow_queries.log")
+
+_stats = {}  # sql -> {"count", "total", "max", "full_scan"}
+_plans = {}  # sql -> (baris rencana, full_scan)
+_lock = threading.Lock()
+_logger = None
+
+
+def _slow_logger():
+    global _logger
+    if _logger is None:
+        _logger = logging.getLogger("letstracker.slow_sql")
+        _logger.setLevel(logging.INFO)
+        _logger.propagate = False
+        handler = RotatingFileHandler(SLOW_LOG_FILE, maxBytes=1_000_000, backupCount=3, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        _logger.addHandler(handler)
+    return _logger
+
+
+def _shape(sql):
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+def _query_plan(conn, sql, params):
+    """EXPLAIN QUERY PLAN (di-cache per bentuk query) lewat cursor biasa agar tidak ikut di-trace."""
+    with _lock:
+        if sql in _plans: return _plans[sql]
+    if not re.match(r"\s*(SELECT|INSERT|UPDATE|DELETE|WITH|REPLACE)\b", sql, re.IGNORECASE):
+        plan = ([], False)
+    else:
+        try:
+            rows = sqlite3.Cursor(conn).execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+            details = [row[-1] for row in rows]
+            plan = (details, any(re.match(r"SCAN \w+$", detail) for detail in details))
+        except sqlite3.Error:
+            plan = ([], False)
+    with _lock:
+        _plans[sql] = plan
+    if plan[1]:
+        _slow_logger().warning(json.dumps({"ts": time.time(), "event": "full_scan", "sql": sql, "plan": plan[0]}, ensure_ascii=False))
+    return plan
+
+
+def _params_preview(params):
+    return [p[:80] if isinstance(p, str) else p for p in (params or [])] if not isinstance(params, dict) else params
+
+
+class TracedCursor(sqlite3.Cursor):
+    _sql, _params, _elapsed, _logged = None, (), 0.0, False
+
+    def _record(self, seconds, new_statement):
+        if not ENABLED: return
+        with _lock:
+            entry = _stats.setdefault(self._sql, {"count": 0, "total": 0.0, "max": 0.0, "full_scan": False})
+            if new_statement: entry["count"] += 1
+            entry["total"] += seconds
+            self._elapsed += seconds
+            entry["max"] = max(entry["max"], self._elapsed)
+        plan, full_scan = _query_plan(self.connection, self._sql, self._params)
+        entry["full_scan"] = full_scan
+        if self._elapsed * 1000 >= SLOW_QUERY_MS and not self._logged:
+            self._logged = True
+            _slow_logger().info(json.dumps({"ts": time.time(), "event": "slow_query", "ms": round(self._elapsed * 1000, 2),
+                                            "sql": self._sql, "params": _params_preview(self._params), "plan": plan,
+                                            "full_scan": full_scan}, ensure_ascii=False, default=str))
+
+    def execute(self, sql, parameters=()):
+        self._sql, self._params, self._elapsed, self._logged = _shape(sql), parameters, 0.0, False
+        with timed("sql"):
+            start = time.perf_counter()
+            result = super().execute(sql, parameters)
+            self._record(time.perf_counter() - start, True)
+        return result
+
+    def executemany(self, sql, seq_of_parameters):
+        self._sql, self._params, self._elapsed, self._logged = _shape(sql), (), 0.0, False
+        with timed("sql"):
+            start = time.perf_counter()
+            result = super().executemany(sql, seq_of_parameters)
+            self._record(time.perf_counter() - start, True)
+        return result
+
+    def executescript(self, sql_script):
+        self._sql, self._params, self._elapsed, self._logged = _shape(sql_script), (), 0.0, False
+        with timed("sql"):
+            start = time.perf_counter()
+            result = super().executescript(sql_script)
+            self._record(time.perf_counter() - start, True)
+        return result
+
+    def _timed_fetch(self, fetch, *args):
+        start = time.perf_counter()
+        rows = fetch(*args)
+        if self._sql is not None: self._record(time.perf_counter() - start, False)
+        return rows
+
+    def fetchall(self):
+        return self._timed_fetch(super().fetchall)
+
+    def fetchmany(self, size=None):
+        return self._timed_fetch(super().fetchmany, *(() if size is None else (size,)))
+
+
+class TracedConnection(sqlite3.Connection):
+    # Connection.execute* bawaan membuat sqlite3.Cursor biasa, jadi diarahkan lewat cursor() di sini
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def stats():
+    """Rangkuman per bentuk query, diurutkan dari total waktu terbesar."""
+    with _lock:
+        rows = [{"sql": sql, **entry} for sql, entry in _stats.items()]
+    return sorted(rows, key=lambda row: -row["total"])
+
+
+def reset():
+    with _lock:
+        _stats.clear()